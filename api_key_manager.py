@@ -7,6 +7,7 @@ automatically switching to alternate keys.
 """
 
 import os
+import threading
 from typing import List, Optional, Callable
 # from colorama import Fore, Style (Removed for Render compatibility)
 
@@ -40,6 +41,8 @@ class APIKeyManager:
         self.key_names = key_names
         self.api_keys = []
         self.current_index = 0
+        # Guards current_index: generators call the API from worker threads
+        self._lock = threading.Lock()
         
         for key_name in key_names:
             key = os.getenv(key_name)
@@ -53,22 +56,31 @@ class APIKeyManager:
     
     def get_current_key(self) -> str:
         """Get the current API key"""
-        return self.api_keys[self.current_index]
+        with self._lock:
+            return self.api_keys[self.current_index]
     
-    def switch_key(self) -> bool:
+    def switch_key(self, failed_key: Optional[str] = None) -> bool:
         """
         Switch to the next available API key
         
+        Args:
+            failed_key: Key that was rate limited. If another thread already
+                       rotated away from it, the current key is kept.
+        
         Returns:
             True if switched successfully, False if no more keys available
         """
         if len(self.api_keys) <= 1:
             return False
         
-        next_index = (self.current_index + 1) % len(self.api_keys)
-        if next_index != self.current_index:
-            self.current_index = next_index
-            return True
+        with self._lock:
+            if failed_key is not None and self.api_keys[self.current_index] != failed_key:
+                return True
+            
+            next_index = (self.current_index + 1) % len(self.api_keys)
+            if next_index != self.current_index:
+                self.current_index = next_index
+                return True
         
         return False
     
@@ -78,7 +90,8 @@ class APIKeyManager:
     
     def reset_to_first(self):
         """Reset to the first API key"""
-        self.current_index = 0
+        with self._lock:
+            self.current_index = 0
 
 
 def call_gemini_with_retry(
@@ -130,7 +143,7 @@ def call_gemini_with_retry(
                         f"Switching to alternate API key...{Style.RESET_ALL}"
                     )
                 
-                if not api_key_manager.switch_key():
+                if not api_key_manager.switch_key(current_key):
                     if verbose:
                         print(
                             f"{Fore.RED}❌ No more API keys available. "
@@ -1,10 +1,23 @@
-import os
 import json
 import re
+import random
 from typing import List, Dict, Any, Optional
-from chatbot_enhanced import GroqChat, BookshelfRAG
+from chatbot_enhanced import GroqChat, BookshelfRAG, extract_json_block
+from json_utils import CODE_FENCE_MARKER_RE
 from firebase_admin import firestore
 
+# Leading list marker on an expansion line ("1. ", "- ", "* ")
+_BULLET_PREFIX_RE = re.compile(r'[\d\-\*\.]+\s+')
+
+# Node ids only need to be unique within a map, not unpredictable: draw their
+# suffixes from one user-space generator instead of an os.urandom syscall each
+_id_rng = random.Random()
+
+
+def _id_suffix(nbytes: int) -> str:
+    """Random hex suffix of nbytes for a node id"""
+    return f"{_id_rng.getrandbits(8 * nbytes):0{2 * nbytes}x}"
+
 class MindMapAgent:
     """
     Source-aware Agent for generating interactive mindmaps using standard RAG.
@@ -15,15 +28,12 @@ class MindMapAgent:
         if not text: return "{}"
         
         # 1. Remove markdown code blocks if present
-        text = re.sub(r'```json\s*', '', text)
-        text = re.sub(r'```\s*', '', text)
+        text = CODE_FENCE_MARKER_RE.sub('', text)
         
-        # 2. Find everything between the first { and last } or first [ and last ]
-        match_obj = re.search(r'(\{.*\}|\[.*\])', text, re.DOTALL)
-        if not match_obj:
+        # 2. Find the first balanced {...} or [...] block
+        cleaned = extract_json_block(text, "{[")
+        if not cleaned:
             return text.strip()
-            
-        cleaned = match_obj.group(0)
         
         # 3. Fix common trailing comma bugs
         cleaned = re.sub(r',\s*\}', '}', cleaned)
@@ -144,7 +154,7 @@ class MindMapAgent:
             }
             
             for i, child in enumerate(children_raw):
-                child_id = f"node-1-{i}-{os.urandom(2).hex()}"
+                child_id = f"node-1-{i}-{_id_suffix(2)}"
                 nodes[child_id] = {
                     "id": child_id,
                     "label": child["label"] or f"Topic {i+1}",
@@ -208,13 +218,14 @@ class MindMapAgent:
             current_title = None
             current_desc = None
             
-            lines = [l.strip() for l in response_text.split('\n') if l.strip()]
+            lines = [l for l in (raw.strip() for raw in response_text.split('\n')) if l]
             for line in lines:
+                lower_line = line.lower()
                 # 1. Match explicit Title/Label/Name
-                if line.lower().startswith(("title:", "label:", "name:")):
+                if lower_line.startswith(("title:", "label:", "name:")):
                     if current_title:
                         children.append({
-                            "id": f"node-{len(children)}-{os.urandom(4).hex()}",
+                            "id": f"node-{len(children)}-{_id_suffix(4)}",
                             "label": current_title,
                             "description": current_desc or "No description",
                             "hasMore": True,
@@ -225,18 +236,18 @@ class MindMapAgent:
                     current_desc = None
                 
                 # 2. Match explicit Desc/Description
-                elif line.lower().startswith(("desc:", "description:")):
+                elif lower_line.startswith(("desc:", "description:")):
                     colon_idx = line.find(":")
                     current_desc = line[colon_idx+1:].strip()
 
                 # 3. Handle cases where titles are just numbers or bullets
-                elif re.match(r'^[\d\-\*\.]+\s+.*', line):
-                     cleaned_line = re.sub(r'^[\d\-\*\.]+\s+', '', line).strip()
+                elif (bullet := _BULLET_PREFIX_RE.match(line)):
+                     cleaned_line = line[bullet.end():].strip()
                      # If we have a current_title, this might be a description if it's long, 
                      # but usually numbered lines are titles.
                      if current_title:
                          children.append({
-                            "id": f"node-{len(children)}-{os.urandom(4).hex()}",
+                            "id": f"node-{len(children)}-{_id_suffix(4)}",
                             "label": current_title,
                             "description": current_desc or "No description",
                             "hasMore": True,
@@ -252,7 +263,7 @@ class MindMapAgent:
             # Save last item
             if current_title:
                 children.append({
-                    "id": f"node-{len(children)}-{os.urandom(4).hex()}",
+                    "id": f"node-{len(children)}-{_id_suffix(4)}",
                     "label": current_title,
                     "description": current_desc or "No description",
                     "hasMore": True,
@@ -109,16 +109,16 @@ class OpenSearchManager:
         results = []
         for hit in response['hits']['hits']:
             source = hit['_source']
-            highlight = hit.get('highlight', {}).get('content', [])
-            snippet = highlight[0] if highlight else source['content'][:200]
+            title = source.get('title')
+            highlight = hit.get('highlight', {}).get('content')
             
             results.append({
                 "id": hit['_id'],
                 "score": hit['_score'],
-                "title": source.get('title'),
-                "content": snippet, # Return snippet for display/context
+                "title": title,
+                "content": highlight[0] if highlight else source['content'][:200], # Return snippet for display/context
                 "full_content": source.get('content'), # Optional: return full text if needed
-                "source": source.get('title') # Alias for RAG compatibility
+                "source": title # Alias for RAG compatibility
             })
             
         return results
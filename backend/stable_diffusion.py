@@ -1,10 +1,11 @@
 import os
-import requests
 import io
 import base64
 from typing import Optional
 from PIL import Image
 
+from http_utils import HTTP_SESSION
+
 class StableDiffusionGenerator:
     """
     Handles image generation using Stability AI API (prioritized) or Hugging Face.
@@ -18,6 +19,9 @@ class StableDiffusionGenerator:
         # Stability AI Endpoint (SDXL 1.0)
         self.stability_engine_id = "stable-diffusion-xl-1024-v1-0"
         self.stability_api_host = "https://api.stability.ai"
+        
+        # Reuse the shared keep-alive pool across the many images of a video
+        self.session = HTTP_SESSION
 
     def generate_image(self, prompt: str, output_path: str) -> Optional[str]:
         """
@@ -41,9 +45,10 @@ class StableDiffusionGenerator:
             # Flux is great at complex prompts and handles "no text" well
             enhanced_prompt = f"{prompt}, high quality scientific illustration, detailed 4k"
             encoded_prompt = urllib.parse.quote(enhanced_prompt)
-            url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1024&height=1024&nologo=true&seed={int(os.getpid())}"
+            url = f"https://image.pollinations.ai/prompt/{encoded_prompt}"
+            params = {"width": 1024, "height": 1024, "nologo": "true", "seed": os.getpid()}
             
-            response = requests.get(url, timeout=60)
+            response = self.session.get(url, params=params, timeout=60)
             if response.status_code == 200:
                 image = Image.open(BytesIO(response.content))
                 image.save(output_path)
@@ -74,11 +79,12 @@ class StableDiffusionGenerator:
             "height": 1024,
             "width": 1024,
             "samples": 1,
+            "sampler": "K_DPMPP_2M", # Multistep solver: full quality within the 20-step budget
             "steps": 20, # User requested 20 steps
         }
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = self.session.post(url, headers=headers, json=payload)
             
             if response.status_code != 200:
                 error_detail = "Unknown error"
@@ -1,13 +1,18 @@
-from chatbot_enhanced import GroqChat, GeminiChat, BookshelfRAG, EdgeTTS, research, ImageGenerator
+from chatbot_enhanced import GroqChat, GeminiChat, BookshelfRAG, EdgeTTS, research, ImageGenerator, extract_json_block
+from json_utils import json_loads, CODE_FENCE_MARKER_RE
 from firebase_admin import firestore
 import uuid
 import os
-import json
+import io
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from mutagen.mp3 import MP3
 from stable_diffusion import StableDiffusionGenerator
 
+# "Host A: " / "Host B: " speaker tag at the start of a narration line
+_SPEAKER_PREFIX_RE = re.compile(r'^(Host A|Host B):\s*')
+
 # Initialize SD Generator
 sd_generator = StableDiffusionGenerator()
 
@@ -43,15 +48,12 @@ class VideoAgent:
         if not text: return "{}"
         
         # Remove markdown code blocks
-        text = re.sub(r'```json\s*', '', text)
-        text = re.sub(r'```\s*', '', text)
+        text = CODE_FENCE_MARKER_RE.sub('', text)
         
-        # Find the first { and last }
-        match_obj = re.search(r'(\{.*\})', text, re.DOTALL)
-        if not match_obj:
+        # Find the first balanced {...} block
+        cleaned = extract_json_block(text)
+        if not cleaned:
             return text.strip()
-            
-        cleaned = match_obj.group(0)
         
         # Minor fixes for common JSON errors
         cleaned = re.sub(r',\s*\}', '}', cleaned)
@@ -101,6 +103,17 @@ class VideoAgent:
 
         return "\n".join(context_parts) if context_parts else "No specific context found. Use your general scientific knowledge."
 
+    def _generate_step_image(self, index: int, img_prompt: str, img_filename: str) -> Optional[str]:
+        """Generate one step image, trying SD first and falling back to Pollinations."""
+        img_path = os.path.join(self.image_base_path, img_filename)
+        generated_file = sd_generator.generate_image(img_prompt, img_path)
+        
+        if not generated_file:
+            # Fallback
+            print(f"VideoAgent: Falling back to standard generator for step {index}")
+            generated_file = ImageGenerator.generate_image(img_prompt, img_filename, self.image_base_path)
+        return generated_file
+
     def generate_scene(self, topic: str, user_id: str, session_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Generates a visually stunning scientific animation JSON using Llama 3.
@@ -150,68 +163,65 @@ class VideoAgent:
             # Using a cheap & fast Llama model as requested
             response_text = GroqChat.chat(prompt, model="llama-3.1-8b-instant", json_mode=True)
             cleaned_json = self._clean_json(response_text)
-            scene_data = json.loads(cleaned_json)
+            scene_data = json_loads(cleaned_json)
 
-            full_audio_bytes = b""
             current_time_ms = 0
+            image_jobs = []
             
             # Process each step
             steps = scene_data.get('steps', [])
             
             print(f"VideoAgent: Processing {len(steps)} steps for media generation...")
             
-            for i, step in enumerate(steps):
-                narration = step.get('narration', '')
-                speaker = step.get('speaker', 'Host A')
-                img_prompt = step.get('imagePrompt')
-                
-                # --- 1. Audio Generation & Stitching ---
-                voice = self.voices.get(speaker, self.voices["Host A"])
-                clean_text = re.sub(r'^(Host A|Host B):\s*', '', narration)
-                
-                step_audio_bytes = EdgeTTS.generate_speech(clean_text, voice=voice)
-                
-                step_duration_ms = 0
-                if step_audio_bytes:
-                    # Append strictly to full audio
-                    full_audio_bytes += step_audio_bytes
+            # Synthesize every step's narration concurrently; each EdgeTTS call is an
+            # independent network round-trip, so only the stitching below must be in order
+            tts_jobs = []
+            for step in steps:
+                voice = self.voices.get(step.get('speaker', 'Host A'), self.voices["Host A"])
+                tts_jobs.append((_SPEAKER_PREFIX_RE.sub('', step.get('narration', '')), voice))
+            
+            # Stream each step's narration straight into the full track on disk as its
+            # synthesis finishes, so only steps not yet written are held in memory
+            full_audio_filename = f"{scene_id}_full_narration.mp3"
+            full_audio_path = os.path.join(self.audio_base_path, full_audio_filename)
+            with ThreadPoolExecutor(max_workers=max(1, min(4, len(tts_jobs)))) as executor, \
+                    open(full_audio_path, "wb") as full_audio:
+                step_audio = executor.map(lambda job: EdgeTTS.generate_speech(job[0], voice=job[1]), tts_jobs)
+                for i, (step, step_audio_bytes) in enumerate(zip(steps, step_audio)):
+                    img_prompt = step.get('imagePrompt')
                     
-                    # Calculate duration
-                    try:
-                        # Create temporary file to measure duration
-                        temp_path = os.path.join(self.audio_base_path, f"temp_{scene_id}_{i}.mp3")
-                        with open(temp_path, "wb") as f:
-                            f.write(step_audio_bytes)
+                    # --- 1. Audio Stitching ---
+                    step_duration_ms = 0
+                    if step_audio_bytes:
+                        # Append strictly to full audio
+                        full_audio.write(step_audio_bytes)
                         
-                        audio_info = MP3(temp_path)
-                        step_duration_ms = int(audio_info.info.length * 1000)
-                        
-                        # Cleanup temp
-                        os.remove(temp_path)
-                    except Exception as e:
-                        print(f"Duration calc error: {e}, defaulting to 3000ms")
-                        step_duration_ms = 3000
-                else:
-                    step_duration_ms = 3000 # Default if TTS fails
-                
-                # Set step timing
-                step['start'] = current_time_ms
-                step['end'] = current_time_ms + step_duration_ms
-                current_time_ms += step_duration_ms
-                
-                # --- 2. Image Generation (Stable Diffusion) ---
-                if img_prompt:
-                    img_filename = f"{scene_id}_img_{i}_{int(current_time_ms)}.jpg"
-                    img_path = os.path.join(self.image_base_path, img_filename)
-                    
-                    # Try SD first, fallback to Pollinations (ImageGenerator) if fails/no key
-                    generated_file = sd_generator.generate_image(img_prompt, img_path)
+                        # Calculate duration straight from the in-memory MP3
+                        try:
+                            audio_info = MP3(io.BytesIO(step_audio_bytes))
+                            step_duration_ms = int(audio_info.info.length * 1000)
+                        except Exception as e:
+                            print(f"Duration calc error: {e}, defaulting to 3000ms")
+                            step_duration_ms = 3000
+                    else:
+                        step_duration_ms = 3000 # Default if TTS fails
                     
-                    if not generated_file:
-                        # Fallback
-                        print(f"VideoAgent: Falling back to standard generator for step {i}")
-                        generated_file = ImageGenerator.generate_image(img_prompt, img_filename, self.image_base_path)
+                    # Set step timing
+                    step['start'] = current_time_ms
+                    step['end'] = current_time_ms + step_duration_ms
+                    current_time_ms += step_duration_ms
                     
+                    # --- 2. Queue Image Generation (Stable Diffusion) ---
+                    if img_prompt:
+                        img_filename = f"{scene_id}_img_{i}_{int(current_time_ms)}.jpg"
+                        image_jobs.append((step, i, img_prompt, img_filename))
+
+            # Generate all step images as one concurrent batch; each is an
+            # independent remote request, so the frames overlap instead of queuing
+            if image_jobs:
+                with ThreadPoolExecutor(max_workers=min(4, len(image_jobs))) as executor:
+                    generated_files = list(executor.map(lambda job: self._generate_step_image(*job[1:]), image_jobs))
+                for (step, _, _, _), generated_file in zip(image_jobs, generated_files):
                     if generated_file:
                         # Add image as background layer
                         step['layers'].insert(0, {
@@ -220,12 +230,6 @@ class VideoAgent:
                             "x": 320, "y": 180, "width": 640, "height": 360, "opacity": 1.0
                         })
 
-            # Save Full Audio
-            full_audio_filename = f"{scene_id}_full_narration.mp3"
-            full_audio_path = os.path.join(self.audio_base_path, full_audio_filename)
-            with open(full_audio_path, "wb") as f:
-                f.write(full_audio_bytes)
-            
             # Finalize Scene Data
             scene_data['topic'] = topic
             scene_data['scene_id'] = scene_id
@@ -1,10 +1,10 @@
 import os
 import time
-import json
 import asyncio
-import requests
-import re
 import base64
+import shutil
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Tuple
 from io import BytesIO
 from datetime import datetime
@@ -12,11 +12,83 @@ from PIL import Image, ImageDraw, ImageFont
 
 # Import your existing utilities
 from firebase_admin import firestore
+from http_utils import HTTP_SESSION
+from json_utils import json_loads, CODE_FENCE_MARKER_RE
+
+# Heavy audio/render deps, imported on first use so processes that never
+# narrate or render a video don't pay for them at startup
+edge_tts = None
+MP3 = None
+ImageClip = None
+concatenate_videoclips = None
+AudioFileClip = None
+
+
+def _load_audio_deps():
+    """Import edge-tts and mutagen on the first narration call"""
+    global edge_tts, MP3
+    if edge_tts is None:
+        import edge_tts as _edge_tts
+        from mutagen.mp3 import MP3 as _MP3
+        MP3 = _MP3
+        edge_tts = _edge_tts
+
+
+def _load_moviepy():
+    """Import the MoviePy clip classes on the first render"""
+    global ImageClip, concatenate_videoclips, AudioFileClip
+    if ImageClip is None:
+        try:
+            # MoviePy v1.x keeps the clip classes under moviepy.editor
+            from moviepy.editor import ImageClip as _ImageClip, concatenate_videoclips as _concat, AudioFileClip as _AudioFileClip
+        except ImportError:
+            # Fallback for MoviePy v2.x
+            from moviepy import ImageClip as _ImageClip, concatenate_videoclips as _concat, AudioFileClip as _AudioFileClip
+        concatenate_videoclips, AudioFileClip = _concat, _AudioFileClip
+        ImageClip = _ImageClip
+
+# Filler the script prompt asks the LLM to append; providers get their own no-text suffix instead
+_NO_TEXT_FILLER = "absolutely no text, no letters, no words, no writing"
+POLLINATIONS_PROMPT_SUFFIX = ", colorful educational illustration, friendly style, vibrant colors, absolutely no text no letters no words no writing no labels no numbers no captions"
+STABILITY_PROMPT_SUFFIX = ", colorful educational illustration, digital art, vibrant, no text no letters no words no labels"
+STABILITY_NEGATIVE_PROMPT = "text, labels, words, letters, numbers, captions, titles, watermarks, signature, blurry"
+INFIP_PROMPT_SUFFIX = ", colorful educational illustration, digital art, vibrant, absolutely no text no letters no words no writing"
+
+# H.264 encoder for final renders. Hosts with a GPU can set e.g. h264_nvenc or
+# h264_videotoolbox to move encoding off the CPU; libx264 is the portable default.
+VIDEO_CODEC = os.getenv("VIDEO_CODEC", "libx264")
 
 # Determine public videos path - MUST be within backend folder for Render deployment
 PUBLIC_VIDEOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'videos')
 os.makedirs(PUBLIC_VIDEOS_DIR, exist_ok=True)
 
+_OVERLAY_FONT = None
+
+
+def _get_overlay_font():
+    """Locate and parse the overlay font once; every scene reuses the same face."""
+    global _OVERLAY_FONT
+    if _OVERLAY_FONT is None:
+        # Try to load a nice font, fall back to default
+        try:
+            # macOS system fonts - try larger size
+            font_paths = [
+                "/System/Library/Fonts/Helvetica.ttc",
+                "/System/Library/Fonts/SFNSDisplay.ttf",
+                "/Library/Fonts/Arial.ttf"
+            ]
+            font = None
+            for fp in font_paths:
+                if os.path.exists(fp):
+                    font = ImageFont.truetype(fp, 52)  # Larger font
+                    break
+            if not font:
+                font = ImageFont.load_default()
+        except:
+            font = ImageFont.load_default()
+        _OVERLAY_FONT = font
+    return _OVERLAY_FONT
+
 class VideoGeneratorService:
     """
     Service to generate educational MP4 videos sequentially and reliably.
@@ -86,7 +158,7 @@ class VideoGeneratorService:
                 "response_format": {"type": "json_object"}
             }
 
-            response_raw = requests.post(
+            response_raw = HTTP_SESSION.post(
                 "https://api.groq.com/openai/v1/chat/completions",
                 headers={
                     "Authorization": f"Bearer {groq_key}",
@@ -97,7 +169,7 @@ class VideoGeneratorService:
             )
 
             if response_raw.status_code == 200:
-                data = response_raw.json()
+                data = json_loads(response_raw.content)
                 response = data["choices"][0]["message"]["content"]
             else:
                 print(f"  ❌ Groq API Error {response_raw.status_code}: {response_raw.text}", flush=True)
@@ -108,10 +180,9 @@ class VideoGeneratorService:
             
             # Clean response if needed (remove markdown)
             if isinstance(response, str):
-                response = re.sub(r'```json\s*', '', response)
-                response = re.sub(r'```\s*', '', response)
+                response = CODE_FENCE_MARKER_RE.sub('', response)
                 response = response.strip()
-                script = json.loads(response)
+                script = json_loads(response)
             else:
                 script = response
             
@@ -169,9 +240,6 @@ class VideoGeneratorService:
 
     def _generate_image_pollinations(self, prompt: str, output_path: str) -> bool:
         """Generate image using Pollinations.ai unified API with Flux model & Turbo fallback."""
-        import urllib.parse
-        import time
-        
         api_key = os.getenv("POLLINATIONS_API_KEY")
         if api_key:
             api_key = api_key.strip().strip('"').strip("'")
@@ -180,27 +248,28 @@ class VideoGeneratorService:
         models = ["flux", "turbo"] # Try Flux first, then Turbo
         
         # Clean prompt: remove common LLM filler
-        clean_prompt = prompt.replace("absolutely no text, no letters, no words, no writing", "").strip()
+        clean_prompt = prompt.replace(_NO_TEXT_FILLER, "").strip()
         clean_prompt = clean_prompt.rstrip('.').rstrip(',').strip()
         # STRICT NO TEXT INSTRUCTION
-        enhanced_prompt = f"{clean_prompt}, colorful educational illustration, friendly style, vibrant colors, absolutely no text no letters no words no writing no labels no numbers no captions"
-        encoded_prompt = urllib.parse.quote(enhanced_prompt)
+        enhanced_prompt = clean_prompt + POLLINATIONS_PROMPT_SUFFIX
+        # The prompt is a path segment, so it still needs quote(); query args go through params
+        url = f"https://gen.pollinations.ai/image/{urllib.parse.quote(enhanced_prompt)}"
 
         for model in models:
             print(f"    Trying Pollinations model: {model}...", flush=True)
             for attempt in range(max_retries):
                 try:
-                    url = f"https://gen.pollinations.ai/image/{encoded_prompt}?model={model}&nologo=true&seed={int(time.time() + attempt)}"
+                    params = {"model": model, "nologo": "true", "seed": int(time.time() + attempt)}
                     
                     headers = {}
                     if api_key:
                         headers["Authorization"] = f"Bearer {api_key}"
                     
-                    response = requests.get(url, headers=headers, timeout=60)
+                    response = HTTP_SESSION.get(url, params=params, headers=headers, timeout=60)
                     
                     if response.status_code == 200:
                         img = Image.open(BytesIO(response.content))
-                        img = img.resize((1280, 720), Image.Resampling.LANCZOS)
+                        img = img.convert('RGB').resize((1280, 720), Image.Resampling.LANCZOS)
                         img.save(output_path, quality=95)
                         print(f"    ✓ Saved ({model}): {output_path}", flush=True)
                         return True
@@ -228,9 +297,9 @@ class VideoGeneratorService:
         print("    Trying Stability AI fallback...", flush=True)
         try:
             # Clean prompt for Stability with STRICT no-text instruction
-            clean_prompt = prompt.replace("absolutely no text, no letters, no words, no writing", "").strip()
+            clean_prompt = prompt.replace(_NO_TEXT_FILLER, "").strip()
             
-            response = requests.post(
+            response = HTTP_SESSION.post(
                 "https://api.stability.ai/v1/generation/stable-diffusion-xl-1024-v1-0/text-to-image",
                 headers={
                     "Content-Type": "application/json",
@@ -239,14 +308,16 @@ class VideoGeneratorService:
                 },
                 json={
                     "text_prompts": [
-                        {"text": f"{clean_prompt}, colorful educational illustration, digital art, vibrant, no text no letters no words no labels", "weight": 1.0},
-                        {"text": "text, labels, words, letters, numbers, captions, titles, watermarks, signature, blurry", "weight": -1.0}
+                        {"text": clean_prompt + STABILITY_PROMPT_SUFFIX, "weight": 1.0},
+                        {"text": STABILITY_NEGATIVE_PROMPT, "weight": -1.0}
                     ],
                     "cfg_scale": 7,
                     "height": 1024,
                     "width": 1024,
                     "samples": 1,
-                    "steps": 30,
+                    # DPM++ 2M converges in ~20 steps where the default sampler needs 30
+                    "sampler": "K_DPMPP_2M",
+                    "steps": 20,
                 },
                 timeout=60
             )
@@ -256,7 +327,7 @@ class VideoGeneratorService:
                 for i, image in enumerate(data["artifacts"]):
                     image_data = base64.b64decode(image["base64"])
                     img = Image.open(BytesIO(image_data))
-                    img = img.resize((1280, 720), Image.Resampling.LANCZOS)
+                    img = img.convert('RGB').resize((1280, 720), Image.Resampling.LANCZOS)
                     img.save(output_path, quality=95)
                     print(f"    ✓ Saved (Stability AI): {output_path}", flush=True)
                     return True
@@ -286,8 +357,8 @@ class VideoGeneratorService:
             gen_url = "https://api.infip.pro/v1/images/generations"
             
             # Clean prompt
-            clean_prompt = prompt.replace("absolutely no text, no letters, no words, no writing", "").strip()
-            final_prompt = f"{clean_prompt}, colorful educational illustration, digital art, vibrant, absolutely no text no letters no words no writing"
+            clean_prompt = prompt.replace(_NO_TEXT_FILLER, "").strip()
+            final_prompt = clean_prompt + INFIP_PROMPT_SUFFIX
             
             payload = {
                 "model": "img4",
@@ -298,7 +369,7 @@ class VideoGeneratorService:
             }
             
             print(f"    🚀 Sending request to Infip (img4)...", flush=True)
-            response = requests.post(gen_url, headers=headers, json=payload, timeout=120)
+            response = HTTP_SESSION.post(gen_url, headers=headers, json=payload, timeout=120)
 
             if response.status_code == 200:
                 data = response.json()
@@ -316,12 +387,12 @@ class VideoGeneratorService:
                 # Retry download logic
                 for attempt in range(3):
                     try:
-                        img_response = requests.get(image_url, timeout=60)
+                        img_response = HTTP_SESSION.get(image_url, timeout=60)
                         if img_response.status_code == 200:
                             img = Image.open(BytesIO(img_response.content))
                             img.load() # Force load to check for truncation
                             # Resize to standard 1280x720 for video
-                            img = img.resize((1280, 720), Image.Resampling.LANCZOS)
+                            img = img.convert('RGB').resize((1280, 720), Image.Resampling.LANCZOS)
                             img.save(output_path, quality=95)
                             print(f"    ✓ Saved (Infip AI): {output_path}", flush=True)
                             return True
@@ -350,23 +421,7 @@ class VideoGeneratorService:
             img = Image.open(image_path)
             draw = ImageDraw.Draw(img)
             
-            # Try to load a nice font, fall back to default
-            try:
-                # macOS system fonts - try larger size
-                font_paths = [
-                    "/System/Library/Fonts/Helvetica.ttc",
-                    "/System/Library/Fonts/SFNSDisplay.ttf",
-                    "/Library/Fonts/Arial.ttf"
-                ]
-                font = None
-                for fp in font_paths:
-                    if os.path.exists(fp):
-                        font = ImageFont.truetype(fp, 52)  # Larger font
-                        break
-                if not font:
-                    font = ImageFont.load_default()
-            except:
-                font = ImageFont.load_default()
+            font = _get_overlay_font()
             
             # Calculate text position
             width, height = img.size
@@ -392,26 +447,22 @@ class VideoGeneratorService:
             
             # Draw semi-transparent background for readability
             padding = 18
-            bg_bbox = (x - padding, y - padding, x + text_width + padding, y + text_height + padding)
-            
-            # Create overlay for semi-transparent background
-            overlay = Image.new('RGBA', img.size, (0, 0, 0, 0))
-            overlay_draw = ImageDraw.Draw(overlay)
-            overlay_draw.rounded_rectangle(bg_bbox, radius=12, fill=(0, 0, 0, 200))
+            box_width = text_width + 2 * padding
+            box_height = text_height + 2 * padding
             
-            # Convert original to RGBA if needed
-            if img.mode != 'RGBA':
-                img = img.convert('RGBA')
+            # Blend only the text box region rather than compositing a full-frame RGBA layer
+            box = Image.new('RGBA', (box_width + 1, box_height + 1), (0, 0, 0, 0))
+            ImageDraw.Draw(box).rounded_rectangle((0, 0, box_width, box_height), radius=12, fill=(0, 0, 0, 200))
             
-            # Paste overlay
-            img = Image.alpha_composite(img, overlay)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            img.paste(box, (x - padding, y - padding), box)
             
             # Draw text
             draw = ImageDraw.Draw(img)
-            draw.text((x, y), text, font=font, fill=(255, 255, 255, 255))
+            draw.text((x, y), text, font=font, fill=(255, 255, 255))
             
             # Save back
-            img = img.convert('RGB')
             img.save(image_path, quality=95)
             
         except Exception as e:
@@ -431,9 +482,7 @@ class VideoGeneratorService:
     async def _generate_audio(self, text: str, output_path: str) -> float:
         """Generate audio using EdgeTTS and return duration."""
         try:
-            import edge_tts
-            from mutagen.mp3 import MP3
-            
+            _load_audio_deps()
             voice = "en-US-ChristopherNeural"
             communicate = edge_tts.Communicate(text, voice, rate="-2%")
             await communicate.save(output_path)
@@ -444,36 +493,101 @@ class VideoGeneratorService:
             print(f"    ⚠️ Audio failed: {e}", flush=True)
             return 3.0 # Default duration
 
+    async def _generate_audio_batch(self, texts: List[str], output_paths: List[str], max_concurrency: int = 4) -> List[float]:
+        """Generate narration for all scenes concurrently. Returns durations in scene order."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _bounded(text: str, output_path: str) -> float:
+            async with semaphore:
+                return await self._generate_audio(text, output_path)
+        
+        return await asyncio.gather(*(_bounded(t, p) for t, p in zip(texts, output_paths)))
+
+    def _concat_audio_files(self, audio_paths: List[str], output_path: str):
+        """Append each scene's MP3 to output_path in order, streaming file to file."""
+        with open(output_path, 'wb') as out:
+            for path in audio_paths:
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        shutil.copyfileobj(f, out)
+
     def combine_video(self, scenes_data: List[Dict], audio_path: str, output_path: str):
         """Combine images and audio into video using MoviePy."""
         try:
-            # MoviePy v2.x compatible imports
-            try:
-                from moviepy.editor import ImageClip, concatenate_videoclips, AudioFileClip
-            except ImportError:
-                # Fallback for MoviePy v2.x
-                from moviepy import ImageClip, concatenate_videoclips, AudioFileClip
-            
+            _load_moviepy()
             clips = []
-            for scene in scenes_data:
-                img_path = scene['image_path']
-                duration = scene['duration']
-                clip = ImageClip(img_path).with_duration(duration)
-                clips.append(clip)
-            
-            final_video = concatenate_videoclips(clips, method="compose")
-            
-            if os.path.exists(audio_path):
-                audio = AudioFileClip(audio_path)
-                final_video = final_video.with_audio(audio)
-            
-            final_video.write_videofile(output_path, fps=24, codec="libx264", audio_codec="aac", preset="ultrafast", threads=1, logger="bar")
+            audio = None
+            final_video = None
+            try:
+                for scene in scenes_data:
+                    img_path = scene['image_path']
+                    duration = scene['duration']
+                    clip = ImageClip(img_path).with_duration(duration)
+                    clips.append(clip)
+                
+                # Every scene image is normalized to 1280x720, so frames can be
+                # chained directly instead of composited onto a canvas per frame
+                final_video = concatenate_videoclips(clips, method="chain")
+                
+                if os.path.exists(audio_path):
+                    audio = AudioFileClip(audio_path)
+                    final_video = final_video.with_audio(audio)
+                
+                # preset/tune names are x264-specific; hardware encoders use their own defaults
+                encoder_args = {"preset": "ultrafast", "ffmpeg_params": ["-tune", "stillimage"]} if VIDEO_CODEC == "libx264" else {}
+                final_video.write_videofile(output_path, fps=24, codec=VIDEO_CODEC, audio_codec="aac", threads=1, logger="bar", **encoder_args)
+            finally:
+                # Release decoded frames and the ffmpeg audio reader now, not at GC time;
+                # the service is long-lived and renders back to back
+                for c in [final_video, audio, *clips]:
+                    if c is not None:
+                        c.close()
             print("  ✅ Video rendering complete!", flush=True)
             return True
         except Exception as e:
             print(f"  ❌ Rendering failed: {e}", flush=True)
             return False
 
+    def _render_scene_image(self, scene: Dict, img_path: str, topic: str, index: int, total: int):
+        """Generate one scene image with provider fallbacks, then add its text overlay."""
+        print(f"  Processing Scene {index+1}/{total}...", flush=True)
+        
+        # Image Generation Loop (Smart Fallback)
+        # 1. Try Infip AI (Primary)
+        success = self._generate_image_infip(scene['image_prompt'], img_path)
+        
+        # 2. Try Pollinations Fallback (Flux -> Turbo)
+        if not success:
+            success = self._generate_image_pollinations(scene['image_prompt'], img_path)
+        
+        # 3. Try Stability AI Fallback
+        if not success:
+            success = self._generate_image_stability(scene['image_prompt'], img_path)
+        
+        # 3. Create Placeholder as last resort
+        if not success:
+            self._create_placeholder_image(scene.get('title', topic), img_path)
+        
+        self._add_text_overlay(img_path, scene.get('overlay_text', ''), scene.get('overlay_position', 'top'))
+
+    def _download_scene_image(self, url: str, img_path: str, title: str):
+        """Download one pre-generated scene image, falling back to a placeholder."""
+        if not url:
+            self._create_placeholder_image(title, img_path)
+            return
+        try:
+            response = HTTP_SESSION.get(url, timeout=30)
+            if response.status_code == 200:
+                img = Image.open(BytesIO(response.content))
+                img = img.convert('RGB').resize((1280, 720), Image.Resampling.LANCZOS)
+                img.save(img_path, quality=95)
+                print(f"    ✓ Downloaded image from Firebase: {img_path}", flush=True)
+            else:
+                self._create_placeholder_image(title, img_path)
+        except Exception as e:
+            print(f"    ⚠ Failed to download: {e}, using placeholder", flush=True)
+            self._create_placeholder_image(title, img_path)
+
     def generate_video_background_task(self, topic: str, user_id: str, session_id: str = None):
         """Main entry point for background task."""
         video_id = str(int(time.time()))
@@ -526,56 +640,36 @@ class VideoGeneratorService:
                 print(f"❌ Script generation CRASHED: {e}", flush=True)
                 raise e
             
-            # 3. Generate Assets Sequentially
-            combined_audio = b""
+            # 3. Generate Assets
             processed_scenes = []
             
-            for i, scene in enumerate(scenes):
-                print(f"  Processing Scene {i+1}/{len(scenes)}...", flush=True)
-                
-                # Image Generation Loop (Smart Fallback)
-                img_path = os.path.join(temp_dir, f"scene_{i}.png")
-                
-                # 1. Try Infip AI (Primary)
-                success = self._generate_image_infip(scene['image_prompt'], img_path)
-                
-                # 2. Try Pollinations Fallback (Flux -> Turbo)
-                if not success:
-                    success = self._generate_image_pollinations(scene['image_prompt'], img_path)
-                
-                # 3. Try Stability AI Fallback
-                if not success:
-                    success = self._generate_image_stability(scene['image_prompt'], img_path)
-                
-                # 3. Create Placeholder as last resort
-                if not success:
-                    self._create_placeholder_image(scene.get('title', topic), img_path)
-                
-                self._add_text_overlay(img_path, scene.get('overlay_text', ''), scene.get('overlay_position', 'top'))
-                
-                # Audio
-                scene_audio_path = os.path.join(temp_dir, f"audio_{i}.mp3")
-                asyncio.run(self._generate_audio(scene['narration'], scene_audio_path))
-                
-                # Read audio bytes for combining
-                with open(scene_audio_path, 'rb') as f:
-                    combined_audio += f.read()
+            audio_paths = [os.path.join(temp_dir, f"audio_{i}.mp3") for i in range(len(scenes))]
+            # Intermediate frame: JPEG encodes far faster than zlib PNG and MoviePy reads it the same
+            img_paths = [os.path.join(temp_dir, f"scene_{i}.jpg") for i in range(len(scenes))]
+            
+            # Scene images are independent remote calls: start them on a small pool first,
+            # so they run while this thread fetches the narration, then stitch both in order
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                image_futures = [
+                    executor.submit(self._render_scene_image, scene, img_path, topic, i, len(scenes))
+                    for i, (scene, img_path) in enumerate(zip(scenes, img_paths))
+                ]
                 
-                # Get duration
-                from mutagen.mp3 import MP3
-                try:
-                    duration = MP3(scene_audio_path).info.length
-                except:
-                    duration = 3.0
+                # Narration is network-bound and independent per scene: fetch it all concurrently
+                print(f"  🔊 Generating narration for {len(scenes)} scenes...", flush=True)
+                durations = asyncio.run(self._generate_audio_batch([s['narration'] for s in scenes], audio_paths))
                 
+                for future in image_futures:
+                    future.result()
+            
+            for i, img_path in enumerate(img_paths):
                 processed_scenes.append({
                     'image_path': img_path,
-                    'duration': duration
+                    'duration': durations[i]
                 })
             
             # Save full audio (simplified concatenation)
-            with open(full_audio_path, 'wb') as f:
-                f.write(combined_audio)
+            self._concat_audio_files(audio_paths, full_audio_path)
                 
             # 4. Render Video
             print("  🎥 Rendering final video...", flush=True)
@@ -623,7 +717,6 @@ class VideoGeneratorService:
             print(f"  ✅ Video available at: {public_url}", flush=True)
 
             # 6. Cleanup Temp (but KEEP the video file for local fallback)
-            import shutil
             shutil.rmtree(temp_dir)
             
             # 7. Update Firestore: Complete
@@ -700,54 +793,31 @@ class VideoGeneratorService:
             })
             
             processed_scenes = []
-            combined_audio = b''
             
-            for i, scene in enumerate(scenes):
-                print(f"  Processing Scene {i+1}/{len(scenes)}...", flush=True)
-                
-                # Download image from URL
-                img_path = os.path.join(temp_dir, f"scene_{i}.png")
-                if i < len(image_urls) and image_urls[i]:
-                    try:
-                        response = requests.get(image_urls[i], timeout=30)
-                        if response.status_code == 200:
-                            img = Image.open(BytesIO(response.content))
-                            img = img.resize((1280, 720), Image.Resampling.LANCZOS)
-                            img.save(img_path, quality=95)
-                            print(f"    ✓ Downloaded image from Firebase", flush=True)
-                        else:
-                            self._create_placeholder_image(img_path, scene.get('title', f'Scene {i+1}'))
-                    except Exception as e:
-                        print(f"    ⚠ Failed to download: {e}, using placeholder", flush=True)
-                        self._create_placeholder_image(img_path, scene.get('title', f'Scene {i+1}'))
-                else:
-                    self._create_placeholder_image(img_path, scene.get('title', f'Scene {i+1}'))
-                
-                # Generate audio
-                narration = scene.get('narration', '')
-                audio_path = os.path.join(temp_dir, f"scene_{i}.mp3")
-                duration = asyncio.run(self._generate_audio(narration, audio_path))
-                
-                # Append audio
-                if os.path.exists(audio_path):
-                    with open(audio_path, 'rb') as f:
-                        combined_audio += f.read()
-                
+            audio_paths = [os.path.join(temp_dir, f"scene_{i}.mp3") for i in range(len(scenes))]
+            durations = asyncio.run(self._generate_audio_batch([s.get('narration', '') for s in scenes], audio_paths))
+            
+            # Fetch every scene image in one concurrent batch rather than one round-trip at a time
+            img_paths = [os.path.join(temp_dir, f"scene_{i}.jpg") for i in range(len(scenes))]
+            urls = [image_urls[i] if i < len(image_urls) else None for i in range(len(scenes))]
+            titles = [scene.get('title', f'Scene {i+1}') for i, scene in enumerate(scenes)]
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(self._download_scene_image, urls, img_paths, titles))
+            
+            for i, img_path in enumerate(img_paths):
                 processed_scenes.append({
                     'image_path': img_path,
-                    'duration': duration
+                    'duration': durations[i]
                 })
             
             # Save combined audio
-            with open(full_audio_path, 'wb') as f:
-                f.write(combined_audio)
+            self._concat_audio_files(audio_paths, full_audio_path)
             
             # Render video
             print("  🎥 Rendering final video...", flush=True)
             self.combine_video(processed_scenes, full_audio_path, final_video_path)
             
             # Cleanup
-            import shutil
             shutil.rmtree(temp_dir)
             
             # Update Firestore
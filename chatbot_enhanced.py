@@ -1,5 +1,6 @@
 import os
 import io
+import sys
 import json
 import requests
 from datetime import datetime
@@ -13,7 +14,6 @@ import hashlib
 from collections import defaultdict
 import re
 import uuid
-from web_search_client import WebSearchClient
 import asyncio
 try:
     import edge_tts
@@ -23,6 +23,11 @@ except ImportError:
     print("⚠️  edge_tts not installed. Run: pip install edge-tts")
 
 import threading # Added for background extraction
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared keep-alive session for Gemini, Groq, TTS and image calls
+from http_utils import HTTP_SESSION
+from json_utils import CODE_FENCE_MARKER_RE
 
 class BookshelfRAG:
     """
@@ -97,6 +102,15 @@ class BookshelfRAG:
             print(f"DEBUG: Background extraction failed: {e}")
             BookshelfRAG._extraction_status[item_id] = 'failed'
 
+    @staticmethod
+    def _download_item(url: str) -> Optional[bytes]:
+        """Download a bookshelf file, returning None on any failure."""
+        try:
+            resp = HTTP_SESSION.get(url, timeout=10)
+            if resp.status_code == 200: return resp.content
+        except: pass
+        return None
+
     @staticmethod
     def search(bookshelf_items: List[Dict], query: str, top_k: int = 20, user_id: str = None, opensearch_client=None) -> List[Dict]:
         """
@@ -138,6 +152,20 @@ class BookshelfRAG:
         chunk_size = 800
         overlap = 150
 
+        # Download every uncached storage file up front, in parallel, so one
+        # slow file doesn't serialize the rest behind its 10s timeout
+        pending_urls = {}
+        for item in bookshelf_items:
+            item_id = item.get('id') or item.get('storageUrl')
+            if (item_id and not item.get('content') and item.get('storageUrl')
+                    and not BookshelfRAG._text_cache.get(item_id)
+                    and BookshelfRAG._extraction_status.get(item_id) != 'running'):
+                pending_urls[item_id] = item['storageUrl']
+        downloads = {}
+        if pending_urls:
+            with ThreadPoolExecutor(max_workers=min(8, len(pending_urls))) as executor:
+                downloads = dict(zip(pending_urls, executor.map(BookshelfRAG._download_item, pending_urls.values())))
+
         for item in bookshelf_items:
             item_id = item.get('id') or item.get('storageUrl')
             if not item_id: continue
@@ -159,10 +187,7 @@ class BookshelfRAG:
                      try: file_bytes = base64.b64decode(item['content'])
                      except: pass
                 elif item.get('storageUrl'):
-                    try:
-                        resp = requests.get(item['storageUrl'], timeout=10)
-                        if resp.status_code == 200: file_bytes = resp.content
-                    except: pass
+                    file_bytes = downloads.get(item_id)
                 
                 if file_bytes:
                     # 1. Immediate Extraction (First 50 pages)
@@ -192,24 +217,30 @@ class BookshelfRAG:
                 continue
 
             # Search Logic (Standard)
+            # Lowercase once per item instead of once per overlapping chunk. lower()
+            # can change length (e.g. 'İ'), so the shared indices are only valid
+            # when it doesn't; otherwise each chunk is lowercased on its own.
+            text_lower = text.lower()
+            lower_aligned = len(text_lower) == len(text)
+            # Per-item values hoisted out of the chunk loop
+            note = ""
+            if BookshelfRAG._extraction_status.get(item_id) == 'running':
+                note = " [Note: Still reading rest of book...]"
+            source = item.get('title', 'Unknown Source')
             for i in range(0, len(text), chunk_size - overlap):
-                chunk = text[i:i + chunk_size]
-                if len(chunk) < 50: continue
+                end = i + chunk_size
+                chunk_lower = text_lower[i:end] if lower_aligned else text[i:end].lower()
+                if len(chunk_lower) < 50: continue
                 
                 score = 0
-                chunk_lower = chunk.lower()
                 for term in query_terms:
                     if term in chunk_lower: score += 1
                 
                 if score > 0:
-                    note = ""
-                    if BookshelfRAG._extraction_status.get(item_id) == 'running':
-                        note = " [Note: Still reading rest of book...]"
-                        
                     relevant_chunks.append({
                         'score': score,
-                        'content': chunk + note,
-                        'source': item.get('title', 'Unknown Source'),
+                        'content': text[i:end] + note,
+                        'source': source,
                         'page': 'N/A'
                     })
         
@@ -263,6 +294,49 @@ except ImportError:
     DOCUMENT_PROCESSING_AVAILABLE = False
     print("⚠️  Document processing libraries not available. Run: pip install PyPDF2 pillow pytesseract")
 
+# Structural characters for extract_json_block; everything else is skipped in C
+_JSON_STRUCTURE_RE = re.compile(r'[{}\[\]"\\]')
+
+# Markdown fences around LLM JSON: the fenced payload (bare fence markers to
+# strip come from json_utils.CODE_FENCE_MARKER_RE)
+JSON_FENCE_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+
+
+def extract_json_block(text: str, open_chars: str = "{") -> Optional[str]:
+    """
+    Return the first balanced JSON object/array in text, or None.
+    Starts at the first of open_chars and tracks nesting and string state,
+    visiting only structural characters (no backtracking regex).
+    """
+    starts = [i for i in (text.find(c) for c in open_chars) if i != -1]
+    if not starts:
+        return None
+    start = min(starts)
+    
+    depth = 0
+    in_string = False
+    escaped_pos = -1
+    for match in _JSON_STRUCTURE_RE.finditer(text, start):
+        pos = match.start()
+        if pos == escaped_pos:
+            continue
+        ch = match.group()
+        if ch == '\\':
+            if in_string:
+                escaped_pos = pos + 1
+        elif ch == '"':
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif ch in '{[':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return text[start:pos + 1]
+    return None
+
+
 # Configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 FIREBASE_CREDENTIALS_PATH = "/Users/sandeep/VSCODE/LearnBot/wispen-f4a94-firebase-adminsdk-fbsvc-f1e0e701d7.json"
@@ -302,7 +376,7 @@ class GeminiChat:
         contents.append({"role": "user", "parts": [{"text": user_message}]})
         
         try:
-            response = requests.post(
+            response = HTTP_SESSION.post(
                 url,
                 headers={"Content-Type": "application/json"},
                 json={
@@ -379,7 +453,7 @@ class GroqChat:
                     if json_mode:
                         payload["response_format"] = {"type": "json_object"}
 
-                    response = requests.post(
+                    response = HTTP_SESSION.post(
                         GROQ_API_URL,
                         headers={
                             "Authorization": f"Bearer {GROQ_API_KEY}",
@@ -449,7 +523,7 @@ class GroqChat:
         for attempt in range(3): # Try up to 3 times total sequence
             for current_model in models_to_try:
                 try:
-                    response = requests.post(
+                    response = HTTP_SESSION.post(
                         GROQ_API_URL,
                         headers={
                             "Authorization": f"Bearer {GROQ_API_KEY}",
@@ -514,11 +588,14 @@ class GroqChat:
 
     @staticmethod
     def _get_system_instruction():
+        kb_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'knowledge_base.txt')
         try:
-            kb_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'knowledge_base.txt')
             with open(kb_path, 'r', encoding='utf-8') as f:
                 return f.read()
-        except:
+        except FileNotFoundError:
+            return "You are Wispen, an advanced AI tutor."
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"{Colors.YELLOW}⚠️ Could not read knowledge base: {str(e)}{Colors.END}")
             return "You are Wispen, an advanced AI tutor."
 
 
@@ -531,7 +608,7 @@ class GroqChat:
 
         url = "https://api.groq.com/openai/v1/audio/speech"
         try:
-            response = requests.post(
+            response = HTTP_SESSION.post(
                 url, 
                 headers={
                     "Authorization": f"Bearer {GROQ_API_KEY}",
@@ -588,7 +665,7 @@ class MurfTTS:
         
         try:
             # print(f"Generate speech with Murf: {text[:20]}...")
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = HTTP_SESSION.post(url, headers=headers, json=data, timeout=30)
             
             if response.status_code == 200:
                 json_data = response.json()
@@ -599,7 +676,7 @@ class MurfTTS:
                 elif "audioFile" in json_data:
                     # Fallback if base64 not returned (shouldn't happen with flag)
                     audio_url = json_data["audioFile"]
-                    file_resp = requests.get(audio_url)
+                    file_resp = HTTP_SESSION.get(audio_url)
                     return file_resp.content
             else:
                 print(f"{Colors.YELLOW}⚠️ Murf TTS failed ({response.status_code}): {response.text}{Colors.END}")
@@ -720,9 +797,10 @@ class ImageGenerator:
         try:
             # Clean prompt for URL
             safe_prompt = quote(prompt)
-            url = f"https://image.pollinations.ai/prompt/{safe_prompt}?width=800&height=450&nologo=true&seed={int(time.time())}"
+            url = f"https://image.pollinations.ai/prompt/{safe_prompt}"
+            params = {"width": 800, "height": 450, "nologo": "true", "seed": int(time.time())}
             
-            response = requests.get(url, timeout=30)
+            response = HTTP_SESSION.get(url, params=params, timeout=30)
             if response.status_code == 200:
                 filepath = os.path.join(output_dir, filename)
                 with open(filepath, "wb") as f:
@@ -737,6 +815,20 @@ class ImageGenerator:
 
 
 
+_research_cache = None
+
+
+def _get_research_cache():
+    """Shared 24h memory+disk cache for research results (None if unavailable)"""
+    global _research_cache
+    if _research_cache is None and RAG_PROCESSOR_AVAILABLE:
+        try:
+            _research_cache = EmbeddingCache()
+        except OSError as e:
+            print(f"{Colors.YELLOW}⚠️ Research cache disabled: {str(e)}{Colors.END}")
+    return _research_cache
+
+
 def research(query: str, max_results: int = 5):
     """Perform AI-synthesized web research with Tavily API"""
     if not TAVILY_API_KEY:
@@ -746,20 +838,33 @@ def research(query: str, max_results: int = 5):
     try:
         print(f"{Colors.CYAN}🔍 Researching: {query}...{Colors.END}\n")
         
+        # Imported lazily: pulls in the Tavily SDK, which only research needs
+        from web_search_client import WebSearchClient
         search_client = WebSearchClient(api_key=TAVILY_API_KEY)
-        raw_results = search_client.search(query, max_results=max_results)
         
-        if not raw_results or raw_results.get('results') is None:
-            print(f"{Colors.YELLOW}⚠️ No search results found{Colors.END}\n")
-            return None
+        cache = _get_research_cache()
+        cache_key = f"research_{max_results}_{' '.join(query.lower().split())}"
+        raw_results = cache.get(cache_key) if cache else None
         
-        save_path = f"{query.replace(' ', '_')}_research.json"
-        try:
-            with open(save_path, 'w') as f:
-                json.dump(raw_results, f, indent=2)
-            print(f"{Colors.YELLOW}💾 Research data saved to {save_path}{Colors.END}\n")
-        except Exception as e:
-            print(f"{Colors.YELLOW}⚠️ Could not save research: {str(e)}{Colors.END}\n")
+        if raw_results:
+            print(f"{Colors.GREEN}✓ Using cached research results{Colors.END}\n")
+        else:
+            raw_results = search_client.search(query, max_results=max_results)
+            
+            if not raw_results or raw_results.get('results') is None:
+                print(f"{Colors.YELLOW}⚠️ No search results found{Colors.END}\n")
+                return None
+            
+            if cache:
+                cache.set(cache_key, raw_results)
+            
+            save_path = f"{query.replace(' ', '_')}_research.json"
+            try:
+                with open(save_path, 'w') as f:
+                    json.dump(raw_results, f, indent=2)
+                print(f"{Colors.YELLOW}💾 Research data saved to {save_path}{Colors.END}\n")
+            except Exception as e:
+                print(f"{Colors.YELLOW}⚠️ Could not save research: {str(e)}{Colors.END}\n")
         
         search_client.process_results(raw_results)
         
@@ -1005,6 +1110,17 @@ class FirestoreManager:
         })
 
 
+# (exclusive lower bound, label) tables for the fallback analysis, highest first
+COMPREHENSION_LEVELS = ((85, "advanced"), (70, "intermediate"), (50, "foundational"))
+SESSION_TIME_LEVELS = ((80, "45-60 minutes"), (60, "30-45 minutes"))
+DIFFICULTY_LEVELS = ((85, "advanced"), (70, "intermediate"))
+
+
+def _bucket(value: float, levels: Tuple[Tuple[float, str], ...], default: str) -> str:
+    """Return the label of the first level whose threshold value exceeds"""
+    return next((label for threshold, label in levels if value > threshold), default)
+
+
 class PersonalizationEngine:
     """Advanced AI-powered personalization engine using Gemini for deep content analysis"""
     
@@ -1060,7 +1176,7 @@ Based on this data, provide a JSON analysis with:
 Focus on patterns visible in their questions, explanations, and responses - not just scores."""
         
         try:
-            response = requests.post(
+            response = HTTP_SESSION.post(
                 f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
                 headers={"Content-Type": "application/json"},
                 json={
@@ -1077,9 +1193,9 @@ Focus on patterns visible in their questions, explanations, and responses - not
                 data = response.json()
                 if "candidates" in data and len(data["candidates"]) > 0:
                     ai_response = data["candidates"][0]["content"]["parts"][0]["text"]
-                    json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-                    if json_match:
-                        insights = json.loads(json_match.group(0))
+                    json_text = extract_json_block(ai_response)
+                    if json_text:
+                        insights = json.loads(json_text)
                         insights['engagement_score'] = float(insights.get('engagement_score', 50))
                         return insights
         except Exception as e:
@@ -1125,15 +1241,7 @@ Focus on patterns visible in their questions, explanations, and responses - not
     def _estimate_comprehension(self, user_data: Dict) -> str:
         """Estimate comprehension level from quiz scores"""
         avg_score = user_data.get('average_quiz_score', 50)
-        
-        if avg_score > 85:
-            return "advanced"
-        elif avg_score > 70:
-            return "intermediate"
-        elif avg_score > 50:
-            return "foundational"
-        else:
-            return "novice"
+        return _bucket(avg_score, COMPREHENSION_LEVELS, "novice")
     
     def _identify_strong_subjects(self, user_data: Dict) -> List[str]:
         """Identify subjects where user excels"""
@@ -1150,13 +1258,7 @@ Focus on patterns visible in their questions, explanations, and responses - not
     def _calculate_optimal_session_time(self, user_data: Dict) -> str:
         """Calculate optimal learning session duration"""
         engagement = user_data.get('engagement_score', 50)
-        
-        if engagement > 80:
-            return "45-60 minutes"
-        elif engagement > 60:
-            return "30-45 minutes"
-        else:
-            return "20-30 minutes"
+        return _bucket(engagement, SESSION_TIME_LEVELS, "20-30 minutes")
     
     def _calculate_engagement_score(self, user_data: Dict) -> float:
         """Calculate overall engagement score (0-100)"""
@@ -1173,13 +1275,7 @@ Focus on patterns visible in their questions, explanations, and responses - not
     def _recommend_difficulty(self, user_data: Dict) -> str:
         """Recommend difficulty level based on performance"""
         avg_quiz_score = user_data.get('average_quiz_score', 50)
-        
-        if avg_quiz_score > 85:
-            return "advanced"
-        elif avg_quiz_score > 70:
-            return "intermediate"
-        else:
-            return "beginner"
+        return _bucket(avg_quiz_score, DIFFICULTY_LEVELS, "beginner")
 
 
 class VisualRepresentationGenerator:
@@ -1211,7 +1307,7 @@ Style: Clean, organized, with clear visual hierarchy suitable for {learning_styl
             
             visual_prompt = self.generate_visual_prompt(topic, learning_style)
             
-            response = requests.post(
+            response = HTTP_SESSION.post(
                 STABLE_DIFFUSION_API_URL,
                 headers={"Authorization": f"Bearer {STABLE_DIFFUSION_API_KEY}"},
                 json={
@@ -1293,7 +1389,7 @@ Format as JSON:
 Make the content rich, detailed, and suitable for deep learning and long-term retention."""
         
         try:
-            response = requests.post(
+            response = HTTP_SESSION.post(
                 f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
                 headers={"Content-Type": "application/json"},
                 json={
@@ -1310,12 +1406,11 @@ Make the content rich, detailed, and suitable for deep learning and long-term re
                 data = response.json()
                 if "candidates" in data and len(data["candidates"]) > 0:
                     ai_response = data["candidates"][0]["content"]["parts"][0]["text"]
-                    json_match = re.search(r'```json\s*(.*?)\s*```', ai_response, re.DOTALL)
-                    if not json_match:
-                        json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+                    json_match = JSON_FENCE_RE.search(ai_response)
+                    json_text = json_match.group(1) if json_match else extract_json_block(ai_response)
                     
-                    if json_match:
-                        flashcard_data = json.loads(json_match.group(1) if '```' in ai_response else json_match.group(0))
+                    if json_text:
+                        flashcard_data = json.loads(json_text)
                         actual_count = len(flashcard_data.get('flashcards', []))
                         print(f"{Colors.GREEN}✓ Generated {actual_count} flashcards with rich content{Colors.END}")
                         return flashcard_data
@@ -1398,7 +1493,7 @@ Create a true mind map with RICH CONTENT:
 - Make it suitable for NotebookLM-quality learning materials"""
         
         try:
-            response = requests.post(
+            response = HTTP_SESSION.post(
                 f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
                 headers={"Content-Type": "application/json"},
                 json={
@@ -1415,12 +1510,11 @@ Create a true mind map with RICH CONTENT:
                 data = response.json()
                 if "candidates" in data and len(data["candidates"]) > 0:
                     ai_response = data["candidates"][0]["content"]["parts"][0]["text"]
-                    json_match = re.search(r'```json\s*(.*?)\s*```', ai_response, re.DOTALL)
-                    if not json_match:
-                        json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+                    json_match = JSON_FENCE_RE.search(ai_response)
+                    json_text = json_match.group(1) if json_match else extract_json_block(ai_response)
                     
-                    if json_match:
-                        mindmap_data = json.loads(json_match.group(1) if '```' in ai_response else json_match.group(0))
+                    if json_text:
+                        mindmap_data = json.loads(json_text)
                         self._display_mindmap(mindmap_data)
                         return mindmap_data
         except Exception as e:
@@ -1496,7 +1590,7 @@ Format your response as JSON:
         # Parse JSON from response
         try:
             # Extract JSON from markdown if present
-            json_match = re.search(r'```json\s*(.*?)\s*```', response, re.DOTALL)
+            json_match = JSON_FENCE_RE.search(response)
             if json_match:
                 quiz_data = json.loads(json_match.group(1))
             else:
@@ -1574,12 +1668,26 @@ Format your response as JSON:
         }
 
 
+# Max topic analyses kept in TopicComplexityAnalyzer's process-wide cache
+COMPLEXITY_CACHE_SIZE = 256
+
+
 class TopicComplexityAnalyzer:
     """Advanced topic complexity analyzer with semantic understanding"""
     
+    # topic (normalized) -> analysis, shared by every user of this process so
+    # flashcards, mind maps and quizzes on one topic reuse one Gemini round-trip.
+    # Bounded FIFO: the oldest topic is dropped once COMPLEXITY_CACHE_SIZE is reached.
+    _cache = {}
+    
     @staticmethod
     def analyze_complexity(topic: str) -> Dict:
         """Analyze topic complexity with sophisticated metrics and recommendations"""
+        cache_key = ' '.join(topic.lower().split())
+        cached = TopicComplexityAnalyzer._cache.get(cache_key)
+        if cached:
+            return dict(cached)
+        
         try:
             prompt = f"""Perform an advanced complexity analysis of this topic: "{topic}"
 
@@ -1614,7 +1722,7 @@ Complexity Guide:
 7-8: Significant depth, multiple interconnections
 9-10: Highly advanced, extensive prerequisites, deep mastery required"""
             
-            response = requests.post(
+            response = HTTP_SESSION.post(
                 f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
                 headers={"Content-Type": "application/json"},
                 json={
@@ -1631,16 +1739,20 @@ Complexity Guide:
                 data = response.json()
                 if "candidates" in data and len(data["candidates"]) > 0:
                     ai_response = data["candidates"][0]["content"]["parts"][0]["text"]
-                    json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-                    if json_match:
-                        complexity_data = json.loads(json_match.group(0))
+                    json_text = extract_json_block(ai_response)
+                    if json_text:
+                        complexity_data = json.loads(json_text)
                         complexity_data['mindmap_branches'] = complexity_data.get('recommended_mindmap_branches', 12)
                         print(f"{Colors.YELLOW}🔍 Complexity Analysis:{Colors.END}")
                         print(f"   Complexity Level: {complexity_data.get('complexity_score', 5)}/10")
                         print(f"   Cognitive Level: {complexity_data.get('cognitive_complexity', 'intermediate').title()}")
                         print(f"   Estimated Learning Time: {complexity_data.get('estimated_learning_time_hours', 'varies')} hours")
                         print(f"   {complexity_data.get('complexity_reasoning', '')}\n")
-                        return complexity_data
+                        cache = TopicComplexityAnalyzer._cache
+                        if len(cache) >= COMPLEXITY_CACHE_SIZE:
+                            cache.pop(next(iter(cache)), None)
+                        cache[cache_key] = complexity_data
+                        return dict(complexity_data)
         except Exception as e:
             print(f"{Colors.YELLOW}⚠️ Complexity analysis failed: {str(e)}{Colors.END}")
         
@@ -1670,10 +1782,11 @@ class SourceManager:
     def load_sources(self):
         """Load sources from file"""
         try:
-            if os.path.exists(self.sources_file):
-                with open(self.sources_file, 'r') as f:
-                    self.sources = json.load(f)
-        except Exception as e:
+            with open(self.sources_file, 'r') as f:
+                self.sources = json.load(f)
+        except FileNotFoundError:
+            self.sources = []
+        except (json.JSONDecodeError, OSError) as e:
             print(f"{Colors.YELLOW}⚠️ Error loading sources: {str(e)}{Colors.END}")
             self.sources = []
     
@@ -1739,7 +1852,7 @@ class ReportGenerator:
         print(f"{Colors.MAGENTA}📋 Generating personalized learning report...{Colors.END}")
         
         profile = self.tutor.user_profile
-        chat_content = self.tutor._get_conversation_text() if self.tutor.conversation_history else ""
+        chat_content = self.tutor._get_conversation_text(max_chars=2500) if self.tutor.conversation_history else ""
         insights = self.tutor.personalization.analyze_learning_patterns(profile, chat_content)
         
         report_prompt = f"""Generate a comprehensive learning report for this student session:
@@ -1774,7 +1887,7 @@ Generate a professional, personalized report that includes:
 Make it encouraging and actionable."""
         
         try:
-            response = requests.post(
+            response = HTTP_SESSION.post(
                 f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
                 headers={"Content-Type": "application/json"},
                 json={
@@ -1853,6 +1966,36 @@ Next Learning Goals:
         print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*75}{Colors.END}\n")
 
 
+GEMINI_GENERATION_CONFIG = {
+    "temperature": 0.8,
+    "topK": 40,
+    "topP": 0.95,
+    "maxOutputTokens": 8192,
+}
+
+# Common academic topics
+TOPIC_KEYWORDS = [
+    'photosynthesis', 'algebra', 'calculus', 'physics', 'chemistry',
+    'biology', 'history', 'geography', 'literature', 'grammar',
+    'programming', 'mathematics', 'science', 'python', 'java',
+    'newton', 'einstein', 'shakespeare', 'equation', 'theorem'
+]
+TOPIC_KEYWORDS_RE = re.compile('|'.join(map(re.escape, TOPIC_KEYWORDS)))
+
+
+class Turn:
+    """Single conversation turn; Gemini-shaped dict is only built at request time"""
+    __slots__ = ("role", "text")
+
+    def __init__(self, role: str, text: str):
+        self.role = role
+        self.text = text
+
+    def to_content(self) -> Dict:
+        """Gemini `contents` entry for this turn"""
+        return {"role": self.role, "parts": [{"text": self.text}]}
+
+
 class AdvancedAITutor:
     """Advanced AI Tutor with all enhanced features"""
     
@@ -1862,7 +2005,7 @@ class AdvancedAITutor:
         
         self.api_key = GEMINI_API_KEY
         self.user_id = user_id
-        self.conversation_history = []
+        self.conversation_history: List[Turn] = []
         self.knowledge_base = ""
         self.uploaded_files = []
         self.current_subject = "General"
@@ -1906,6 +2049,8 @@ class AdvancedAITutor:
         
         # Create system prompt
         self.system_prompt = self._create_system_prompt()
+        self._static_prefix = ""
+        self._static_prefix_prompt = None
         
         if knowledge_base_path:
             self.load_knowledge_base(knowledge_base_path)
@@ -1943,7 +2088,7 @@ class AdvancedAITutor:
     
     def _create_system_prompt(self) -> str:
         """Create sophisticated AI tutor system prompt with advanced pedagogical approach"""
-        chat_content = self._get_conversation_text() if self.conversation_history else ""
+        chat_content = self._get_conversation_text(max_chars=2000) if self.conversation_history else ""
         insights = self.personalization.analyze_learning_patterns(self.user_profile, chat_content)
         user_data_context = self._get_comprehensive_user_data()
 
@@ -2198,7 +2343,7 @@ Your goal is to be a transformative educational partner that combines personaliz
         
         # Add conversation history (keep last 20 messages)
         if not skip_history:
-            contents.extend(self.conversation_history[-20:])
+            contents.extend(turn.to_content() for turn in self.conversation_history[-20:])
         
         # Add current message with any uploaded images
         current_content = {"role": "user", "parts": []}
@@ -2218,25 +2363,14 @@ Your goal is to be a transformative educational partner that combines personaliz
         
         contents.append(current_content)
         
-        # Prepare API request
-        request_body = {
-            "contents": contents,
-            "systemInstruction": {
-                "parts": [{"text": self.system_prompt}]
-            },
-            "generationConfig": {
-                "temperature": 0.8,
-                "topK": 40,
-                "topP": 0.95,
-                "maxOutputTokens": 8192,
-            }
-        }
+        # Prepare API request: only the contents are serialized per turn
+        request_body = self._get_static_request_prefix() + ', "contents": ' + json.dumps(contents) + "}"
         
         try:
-            response = requests.post(
+            response = HTTP_SESSION.post(
                 f"{GEMINI_API_URL}?key={self.api_key}",
                 headers={"Content-Type": "application/json"},
-                json=request_body,
+                data=request_body.encode('utf-8'),
                 timeout=60
             )
             response.raise_for_status()
@@ -2247,14 +2381,8 @@ Your goal is to be a transformative educational partner that combines personaliz
                 
                 # Add to history
                 if not skip_history:
-                    self.conversation_history.append({
-                        "role": "user",
-                        "parts": [{"text": user_input}]
-                    })
-                    self.conversation_history.append({
-                        "role": "model",
-                        "parts": [{"text": assistant_text}]
-                    })
+                    self.conversation_history.append(Turn("user", user_input))
+                    self.conversation_history.append(Turn("model", assistant_text))
                 
                 # Clear uploaded files after processing
                 self.uploaded_files = []
@@ -2270,46 +2398,21 @@ Your goal is to be a transformative educational partner that combines personaliz
         except Exception as e:
             return f"❌ Error: {str(e)}"
     
-    def _import_research_sources(self, research_results: Dict, topic: str):
-        """Import research sources to collection"""
-        try:
-            count = 0
-            for result in research_results.get('results', [])[:5]:
-                self.source_manager.add_source({
-                    'title': result.get('title', 'Untitled'),
-                    'url': result.get('url', ''),
-                    'content': result.get('content', '')[:1000],
-                    'topic': topic,
-                    'type': 'research'
-                })
-                count += 1
-            
-            print(f"{Colors.GREEN}✓ Added {count} sources to your collection{Colors.END}\n")
-        except Exception as e:
-            print(f"{Colors.YELLOW}⚠️ Error importing sources: {str(e)}{Colors.END}")
-    
-    def _format_research_results(self, research: Dict) -> str:
-        """Format deep research results for context"""
-        context = "=== DEEP RESEARCH RESULTS ===\n"
-        context += f"Original Query: {research['original_query']}\n"
-        context += f"Research Depth: {research['research_depth']}\n"
-        context += f"Total Sources: {research['total_sources']}\n\n"
-        
-        for idx, result in enumerate(research['results'][:10], 1):
-            context += f"[Source {idx}]\n"
-            context += f"Title: {result['title']}\n"
-            context += f"Relevance: {result.get('relevance_score', 0):.2f}\n"
-            if result.get('url'):
-                context += f"URL: {result['url']}\n"
-            context += f"Content: {result['content'][:500]}...\n"
-            if result.get('full_content'):
-                context += f"Extended Content Available: Yes\n"
-            context += "\n"
-        
-        context += "=== END RESEARCH RESULTS ===\n"
-        context += "Synthesize information from multiple sources to provide a comprehensive answer.\n"
+    def _get_static_request_prefix(self) -> str:
+        """Serialized systemInstruction + generationConfig, without the closing brace.
         
-        return context
+        Rebuilt only when self.system_prompt is replaced.
+        """
+        if self._static_prefix_prompt is not self.system_prompt:
+            static_body = {
+                "systemInstruction": {
+                    "parts": [{"text": self.system_prompt}]
+                },
+                "generationConfig": GEMINI_GENERATION_CONFIG
+            }
+            self._static_prefix = json.dumps(static_body)[:-1]
+            self._static_prefix_prompt = self.system_prompt
+        return self._static_prefix
     
     def _format_file_context(self) -> str:
         """Format uploaded files context"""
@@ -2351,7 +2454,7 @@ Areas for Improvement: [List 2-3 areas]
 Recommended Next Steps: [2-3 suggestions]
 
 Conversation:
-{self._get_conversation_text()[:3000]}
+{self._get_conversation_text(max_chars=3000)}
 
 Provide the summary in natural language, organized clearly."""
         
@@ -2377,39 +2480,34 @@ Provide the summary in natural language, organized clearly."""
         
         print(f"{Colors.GREEN}✓ Session saved: {session_id}{Colors.END}\n")
     
-    def _get_conversation_text(self) -> str:
-        """Get full conversation as text"""
-        text = ""
-        for msg in self.conversation_history:
-            role = "STUDENT" if msg["role"] == "user" else "TUTOR"
-            content = msg["parts"][0]["text"]
-            text += f"{role}: {content}\n\n"
-        return text
+    def _get_conversation_text(self, max_chars: Optional[int] = None) -> str:
+        """Get conversation as text, stopping once max_chars have been gathered"""
+        parts = []
+        append = parts.append
+        size = 0
+        for turn in self.conversation_history:
+            role = "STUDENT" if turn.role == "user" else "TUTOR"
+            part = f"{role}: {turn.text}\n\n"
+            append(part)
+            size += len(part)
+            if max_chars is not None and size >= max_chars:
+                return "".join(parts)[:max_chars]
+        return "".join(parts)
     
     def _extract_topics(self) -> List[str]:
         """Extract discussed topics from conversation"""
         # Simplified topic extraction
-        topics = set()
         conversation = self._get_conversation_text().lower()
         
-        # Common academic topics
-        topic_keywords = [
-            'photosynthesis', 'algebra', 'calculus', 'physics', 'chemistry',
-            'biology', 'history', 'geography', 'literature', 'grammar',
-            'programming', 'mathematics', 'science', 'python', 'java',
-            'newton', 'einstein', 'shakespeare', 'equation', 'theorem'
-        ]
-        
-        for keyword in topic_keywords:
-            if keyword in conversation:
-                topics.add(keyword.title())
+        # Single pass over the conversation for all keywords
+        topics = {match.group(0).title() for match in TOPIC_KEYWORDS_RE.finditer(conversation)}
         
         return list(topics)[:10]
     
     def _save_user_profile(self):
         """Save user profile to Firestore with comprehensive insights"""
         if self.firestore_enabled:
-            chat_content = self._get_conversation_text() if self.conversation_history else ""
+            chat_content = self._get_conversation_text(max_chars=2000) if self.conversation_history else ""
             insights = self.personalization.analyze_learning_patterns(self.user_profile, chat_content)
             self.user_profile['learning_insights'] = insights
             self.user_profile['last_updated'] = datetime.now().isoformat()
@@ -2421,10 +2519,12 @@ Provide the summary in natural language, organized clearly."""
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 self.knowledge_base = f.read()
-            print(f"{Colors.GREEN}✓ Knowledge base loaded: {filepath}{Colors.END}\n")
-            self.system_prompt = self._create_system_prompt()
-        except Exception as e:
+        except (OSError, UnicodeDecodeError) as e:
             print(f"{Colors.RED}✗ Error loading knowledge base: {str(e)}{Colors.END}\n")
+            return
+        
+        print(f"{Colors.GREEN}✓ Knowledge base loaded: {filepath}{Colors.END}\n")
+        self.system_prompt = self._create_system_prompt()
     
     def generate_quiz(self, topic: str, difficulty: str = None, num_questions: int = 5):
         """Generate and administer quiz"""
@@ -2557,7 +2657,7 @@ Provide the summary in natural language, organized clearly."""
         print(f"{Colors.BOLD}{Colors.BLUE}{'═'*85}{Colors.END}\n")
 
         profile = self.user_profile
-        chat_content = self._get_conversation_text() if self.conversation_history else ""
+        chat_content = self._get_conversation_text(max_chars=2000) if self.conversation_history else ""
         insights = self.personalization.analyze_learning_patterns(profile, chat_content)
 
         # Student Profile Section
@@ -2769,83 +2869,95 @@ Focus on their strengths, address weaknesses, and suggest next steps in their le
         print(f"{Colors.YELLOW}Conversation history cleared.{Colors.END}\n")
 
 
+BANNER_TEXT = "\n".join((
+    f"\n{Colors.BOLD}{Colors.BLUE}{'═'*95}{Colors.END}",
+    f"{Colors.BOLD}{Colors.CYAN}{' '*10}🎓 ADVANCED AI TUTOR - PROFESSIONAL LEARNING SYSTEM 🎓{Colors.END}",
+    f"{Colors.BOLD}{Colors.BLUE}{'═'*95}{Colors.END}\n",
+
+    f"{Colors.BOLD}{Colors.GREEN}🚀 CORE FEATURES:{Colors.END}",
+    f"  {Colors.CYAN}●{Colors.END} Advanced AI Tutor with Socratic Method & Evidence-Based Pedagogy",
+    f"  {Colors.CYAN}●{Colors.END} Deep Research with Auto-Approved Educational Resources",
+    f"  {Colors.CYAN}●{Colors.END} Multi-Format File Processing & RAG-Powered Search",
+    f"  {Colors.CYAN}●{Colors.END} Cloud Data Persistence with Firestore Analytics",
+    "",
+
+    f"{Colors.BOLD}{Colors.YELLOW}📚 NOTEBOOKLM-INSPIRED STUDY TOOLS:{Colors.END}",
+    f"  {Colors.CYAN}●{Colors.END} Adaptive Quiz Generation with Smart Difficulty Scaling",
+    f"  {Colors.CYAN}●{Colors.END} AI-Generated Flashcards (Auto-count, Rich Content)",
+    f"  {Colors.CYAN}●{Colors.END} Deep Content Mind Maps (Auto-depth, Multiple Branches)",
+    f"  {Colors.CYAN}●{Colors.END} Visual Representations powered by Stable Diffusion",
+    "",
+
+    f"{Colors.BOLD}{Colors.MAGENTA}💡 INTELLIGENT PERSONALIZATION:{Colors.END}",
+    f"  {Colors.YELLOW}•{Colors.END} Gemini-Powered Learning Pattern Analysis",
+    f"  {Colors.YELLOW}•{Colors.END} Chat Content-Based Comprehension Assessment",
+    f"  {Colors.YELLOW}•{Colors.END} Advanced Topic Complexity Analysis",
+    f"  {Colors.YELLOW}•{Colors.END} Comprehensive Learning Analytics Dashboard",
+    f"  {Colors.YELLOW}•{Colors.END} AI-Generated Personalized Recommendations",
+    "",
+
+    f"{Colors.BOLD}{Colors.BLUE}⚡ POWERED BY:{Colors.END} {Colors.CYAN}Google Gemini 2.0 Flash (Core AI) + Optional Stable Diffusion{Colors.END}",
+    f"{Colors.BOLD}{Colors.BLUE}{'═'*95}{Colors.END}\n",
+)) + "\n"
+
+
 def print_banner():
     """Print professional welcome banner"""
-    print(f"\n{Colors.BOLD}{Colors.BLUE}{'═'*95}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.CYAN}{' '*10}🎓 ADVANCED AI TUTOR - PROFESSIONAL LEARNING SYSTEM 🎓{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{'═'*95}{Colors.END}\n")
-
-    print(f"{Colors.BOLD}{Colors.GREEN}🚀 CORE FEATURES:{Colors.END}")
-    print(f"  {Colors.CYAN}●{Colors.END} Advanced AI Tutor with Socratic Method & Evidence-Based Pedagogy")
-    print(f"  {Colors.CYAN}●{Colors.END} Deep Research with Auto-Approved Educational Resources")
-    print(f"  {Colors.CYAN}●{Colors.END} Multi-Format File Processing & RAG-Powered Search")
-    print(f"  {Colors.CYAN}●{Colors.END} Cloud Data Persistence with Firestore Analytics")
-    print()
-
-    print(f"{Colors.BOLD}{Colors.YELLOW}📚 NOTEBOOKLM-INSPIRED STUDY TOOLS:{Colors.END}")
-    print(f"  {Colors.CYAN}●{Colors.END} Adaptive Quiz Generation with Smart Difficulty Scaling")
-    print(f"  {Colors.CYAN}●{Colors.END} AI-Generated Flashcards (Auto-count, Rich Content)")
-    print(f"  {Colors.CYAN}●{Colors.END} Deep Content Mind Maps (Auto-depth, Multiple Branches)")
-    print(f"  {Colors.CYAN}●{Colors.END} Visual Representations powered by Stable Diffusion")
-    print()
-
-    print(f"{Colors.BOLD}{Colors.MAGENTA}💡 INTELLIGENT PERSONALIZATION:{Colors.END}")
-    print(f"  {Colors.YELLOW}•{Colors.END} Gemini-Powered Learning Pattern Analysis")
-    print(f"  {Colors.YELLOW}•{Colors.END} Chat Content-Based Comprehension Assessment")
-    print(f"  {Colors.YELLOW}•{Colors.END} Advanced Topic Complexity Analysis")
-    print(f"  {Colors.YELLOW}•{Colors.END} Comprehensive Learning Analytics Dashboard")
-    print(f"  {Colors.YELLOW}•{Colors.END} AI-Generated Personalized Recommendations")
-    print()
-
-    print(f"{Colors.BOLD}{Colors.BLUE}⚡ POWERED BY:{Colors.END} {Colors.CYAN}Google Gemini 2.0 Flash (Core AI) + Optional Stable Diffusion{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{'═'*95}{Colors.END}\n")
+    sys.stdout.write(BANNER_TEXT)
+    sys.stdout.flush()
+
+
+HELP_TEXT = "\n".join((
+    f"\n{Colors.BOLD}{Colors.BLUE}{'═'*90}{Colors.END}",
+    f"{Colors.BOLD}{Colors.CYAN}{' '*20}📚 COMMAND REFERENCE 📚{Colors.END}",
+    f"{Colors.BOLD}{Colors.BLUE}{'═'*90}{Colors.END}\n",
+
+    f"{Colors.BOLD}{Colors.GREEN}🎯 LEARNING MANAGEMENT:{Colors.END}",
+    f"  {Colors.CYAN}/profile{Colors.END}                 - Configure personalized learning profile",
+    f"  {Colors.CYAN}/dashboard{Colors.END}               - View comprehensive learning analytics",
+    f"  {Colors.CYAN}/recommendations{Colors.END}         - Get AI-powered learning recommendations",
+    f"  {Colors.CYAN}/subject <name>{Colors.END}          - Set current learning focus area",
+    f"  {Colors.CYAN}/style{Colors.END}                   - Set study style preferences",
+    "",
+
+    f"{Colors.BOLD}{Colors.MAGENTA}📁 CONTENT & RESEARCH:{Colors.END}",
+    f"  {Colors.CYAN}/upload <file>{Colors.END}           - Process documents, images, or PDFs",
+    f"  {Colors.CYAN}/search <query>{Colors.END}          - Search your uploaded documents intelligently",
+    f"  {Colors.CYAN}/research <query>{Colors.END}        - AI-powered deep research with source import",
+    f"  {Colors.CYAN}/load <file>{Colors.END}             - Import external knowledge base",
+    f"  {Colors.CYAN}/sources [topic]{Colors.END}         - View your learning sources collection",
+    "",
+
+    f"{Colors.BOLD}{Colors.YELLOW}📚 STUDY TOOLS (NotebookLM-inspired):{Colors.END}",
+    f"  {Colors.CYAN}/quiz <topic>{Colors.END}            - Generate adaptive quizzes",
+    f"  {Colors.CYAN}/flashcards <topic>{Colors.END}      - Create NotebookLM-style flashcards (AI-decided count)",
+    f"  {Colors.CYAN}/mindmap <topic>{Colors.END}         - Generate rich content mind maps (AI-decided depth)",
+    f"  {Colors.CYAN}/visual <topic>{Colors.END}          - Generate visual representations",
+    "",
+
+    f"{Colors.BOLD}{Colors.BLUE}📊 REPORTING & ANALYTICS:{Colors.END}",
+    f"  {Colors.CYAN}/report{Colors.END}                  - Generate personalized learning report",
+    "",
+
+    f"{Colors.BOLD}{Colors.CYAN}💾 SESSION MANAGEMENT:{Colors.END}",
+    f"  {Colors.CYAN}/save{Colors.END}                    - Persist session with AI summary",
+    f"  {Colors.CYAN}/clear{Colors.END}                   - Reset conversation context",
+    "",
+
+    f"{Colors.BOLD}{Colors.GREEN}🔧 SYSTEM CONTROLS:{Colors.END}",
+    f"  {Colors.CYAN}/help{Colors.END}                    - Display this command reference",
+    f"  {Colors.CYAN}/quit{Colors.END}                    - Exit learning session",
+    "",
+
+    f"{Colors.BOLD}{Colors.MAGENTA}💡 TIP:{Colors.END} {Colors.CYAN}Ask questions naturally or use commands for specific functions{Colors.END}",
+    f"{Colors.BOLD}{Colors.BLUE}{'═'*90}{Colors.END}\n",
+)) + "\n"
 
 
 def print_help():
     """Print professional help menu"""
-    print(f"\n{Colors.BOLD}{Colors.BLUE}{'═'*90}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.CYAN}{' '*20}📚 COMMAND REFERENCE 📚{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{'═'*90}{Colors.END}\n")
-
-    print(f"{Colors.BOLD}{Colors.GREEN}🎯 LEARNING MANAGEMENT:{Colors.END}")
-    print(f"  {Colors.CYAN}/profile{Colors.END}                 - Configure personalized learning profile")
-    print(f"  {Colors.CYAN}/dashboard{Colors.END}               - View comprehensive learning analytics")
-    print(f"  {Colors.CYAN}/recommendations{Colors.END}         - Get AI-powered learning recommendations")
-    print(f"  {Colors.CYAN}/subject <name>{Colors.END}          - Set current learning focus area")
-    print(f"  {Colors.CYAN}/style{Colors.END}                   - Set study style preferences")
-    print()
-
-    print(f"{Colors.BOLD}{Colors.MAGENTA}📁 CONTENT & RESEARCH:{Colors.END}")
-    print(f"  {Colors.CYAN}/upload <file>{Colors.END}           - Process documents, images, or PDFs")
-    print(f"  {Colors.CYAN}/search <query>{Colors.END}          - Search your uploaded documents intelligently")
-    print(f"  {Colors.CYAN}/research <query>{Colors.END}        - AI-powered deep research with source import")
-    print(f"  {Colors.CYAN}/load <file>{Colors.END}             - Import external knowledge base")
-    print(f"  {Colors.CYAN}/sources [topic]{Colors.END}         - View your learning sources collection")
-    print()
-
-    print(f"{Colors.BOLD}{Colors.YELLOW}📚 STUDY TOOLS (NotebookLM-inspired):{Colors.END}")
-    print(f"  {Colors.CYAN}/quiz <topic>{Colors.END}            - Generate adaptive quizzes")
-    print(f"  {Colors.CYAN}/flashcards <topic>{Colors.END}      - Create NotebookLM-style flashcards (AI-decided count)")
-    print(f"  {Colors.CYAN}/mindmap <topic>{Colors.END}         - Generate rich content mind maps (AI-decided depth)")
-    print(f"  {Colors.CYAN}/visual <topic>{Colors.END}          - Generate visual representations")
-    print()
-
-    print(f"{Colors.BOLD}{Colors.BLUE}📊 REPORTING & ANALYTICS:{Colors.END}")
-    print(f"  {Colors.CYAN}/report{Colors.END}                  - Generate personalized learning report")
-    print()
-
-    print(f"{Colors.BOLD}{Colors.CYAN}💾 SESSION MANAGEMENT:{Colors.END}")
-    print(f"  {Colors.CYAN}/save{Colors.END}                    - Persist session with AI summary")
-    print(f"  {Colors.CYAN}/clear{Colors.END}                   - Reset conversation context")
-    print()
-
-    print(f"{Colors.BOLD}{Colors.GREEN}🔧 SYSTEM CONTROLS:{Colors.END}")
-    print(f"  {Colors.CYAN}/help{Colors.END}                    - Display this command reference")
-    print(f"  {Colors.CYAN}/quit{Colors.END}                    - Exit learning session")
-    print()
-
-    print(f"{Colors.BOLD}{Colors.MAGENTA}💡 TIP:{Colors.END} {Colors.CYAN}Ask questions naturally or use commands for specific functions{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{'═'*90}{Colors.END}\n")
+    sys.stdout.write(HELP_TEXT)
+    sys.stdout.flush()
 
 
 def setup_profile(tutor: AdvancedAITutor):
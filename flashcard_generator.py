@@ -54,6 +54,9 @@ GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 GROQ_MODEL = "llama-3.1-8b-instant"
 
+# Opening character of a JSON reply -> regex matching that bracket pair
+_BRACKET_RES = {'[': re.compile(r'[\[\]]'), '{': re.compile(r'[{}]')}
+
 # Content chunking settings
 MAX_CONTENT_SIZE = 200000  # ~200KB per chunk for analysis
 MAX_EXTRACTION_SIZE = 150000  # ~150KB per extraction
@@ -195,35 +198,16 @@ class FlashcardGenerator:
         
         response = response.strip()
         
-        # Find JSON object or array boundaries
-        if response.startswith('['):
-            # Find the last valid closing bracket
-            depth = 0
-            last_valid = -1
-            for i, char in enumerate(response):
-                if char == '[':
-                    depth += 1
-                elif char == ']':
-                    depth -= 1
-                    if depth == 0:
-                        last_valid = i
-                        break
-            if last_valid > 0:
-                response = response[:last_valid + 1]
-        elif response.startswith('{'):
-            # Find the last valid closing brace
+        # Find JSON object or array boundaries: step only over bracket characters, found by a C-level regex scan
+        bracket_re = _BRACKET_RES.get(response[:1])
+        if bracket_re:
+            opener = response[0]
             depth = 0
-            last_valid = -1
-            for i, char in enumerate(response):
-                if char == '{':
-                    depth += 1
-                elif char == '}':
-                    depth -= 1
-                    if depth == 0:
-                        last_valid = i
-                        break
-            if last_valid > 0:
-                response = response[:last_valid + 1]
+            for m in bracket_re.finditer(response):
+                depth += 1 if m.group() == opener else -1
+                if depth == 0:
+                    response = response[:m.end()]
+                    break
         
         return response
     
@@ -10,6 +10,7 @@ This script provides:
 
 Dependencies:
     pip install requests colorama python-dotenv PyPDF2 python-docx
+    pip install pymupdf  # optional, much faster PDF text extraction
 
 Usage:
     python flashcard_main.py
@@ -22,6 +23,7 @@ import sys
 import argparse
 from pathlib import Path
 from typing import List, Optional
+from contextlib import contextmanager
 import time
 
 # from colorama import Fore, Style, init (Removed for Render compatibility)
@@ -46,6 +48,23 @@ class Style:
 # init(autoreset=True)
 
 
+@contextmanager
+def _open_pdf_pages(file_path: Path):
+    """Yield (page_count, page texts) from PyMuPDF when installed, else PyPDF2"""
+    try:
+        # PyMuPDF extracts text in native MuPDF code, typically ~10x faster than PyPDF2
+        import fitz
+    except ImportError:
+        import PyPDF2
+        with open(file_path, 'rb') as f:
+            pdf_reader = PyPDF2.PdfReader(f)
+            yield len(pdf_reader.pages), (page.extract_text() for page in pdf_reader.pages)
+        return
+    
+    with fitz.open(str(file_path)) as doc:
+        yield doc.page_count, (page.get_text("text") for page in doc)
+
+
 class FlashcardApp:
     """
     Main application for flashcard generation with file support
@@ -96,15 +115,12 @@ class FlashcardApp:
             # PDF files
             elif file_path.suffix == '.pdf':
                 try:
-                    import PyPDF2
-                    content = ""
-                    with open(file_path, 'rb') as f:
-                        pdf_reader = PyPDF2.PdfReader(f)
-                        for page in pdf_reader.pages:
-                            content += page.extract_text() + "\n"
+                    with _open_pdf_pages(file_path) as (_, page_texts):
+                        pages = list(page_texts)
                 except ImportError:
-                    print(f"{Fore.YELLOW}⚠️ PyPDF2 not installed. Install with: pip install PyPDF2{Style.RESET_ALL}")
+                    print(f"{Fore.YELLOW}⚠️ No PDF reader installed. Install with: pip install pymupdf (or PyPDF2){Style.RESET_ALL}")
                     return None
+                content = "".join(text + "\n" for text in pages)
             
             # DOCX files
             elif file_path.suffix == '.docx':
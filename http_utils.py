@@ -0,0 +1,25 @@
+"""
+Shared HTTP session
+===================
+
+One keep-alive requests.Session for the chatbot, video and image
+generators, so repeated calls to the same host skip the TCP + TLS
+handshake. Kept free of app imports so any module can use it cheaply.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Transient gateway errors on idempotent requests (GET/HEAD/...) are retried
+# here; POSTs are left to each caller's own retry and key-rotation logic
+HTTP_RETRY = Retry(
+    total=2,
+    backoff_factor=0.5,
+    status_forcelist=(502, 503, 504),
+    raise_on_status=False,
+)
+
+# Sized for a few concurrent background jobs, since each runs in its own thread
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=HTTP_RETRY))
@@ -0,0 +1,34 @@
+"""
+Shared JSON helpers
+===================
+
+orjson-backed parse/serialize with a stdlib fallback, plus the fence pattern
+used to clean LLM JSON replies. Kept dependency-free so the standalone
+generators can import it without loading the chatbot stack.
+"""
+
+import json
+import re
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Opening/closing markdown fence markers around an LLM's JSON reply
+CODE_FENCE_MARKER_RE = re.compile(r'```(?:json)?\s*')
+
+
+def json_loads(data):
+    """Parse JSON from str or bytes, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
@@ -20,17 +20,25 @@ Usage:
 """
 
 import os
+import sys
 import json
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass, field
 from datetime import datetime
 import time
-import uuid
+import threading
+from itertools import count, islice
 import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 # from colorama import Fore, Style, init (Removed for Render compatibility)
 from api_key_manager import APIKeyManager, call_gemini_with_retry
+from json_utils import json_loads, json_dumps
 
 # Dummy classes to replace colorama
 class Fore:
@@ -49,12 +57,109 @@ class Style:
 # Gemini API Configuration
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
 
+# Leading/trailing markdown fence around an LLM's JSON reply
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?\s*|\s*```\s*\Z")
+_JSON_DECODER = json.JSONDecoder()
+
+# Markdown bullet emoji per depth (root, sections, concepts, everything deeper)
+MARKDOWN_LEVEL_EMOJIS = ("🎯", "📌", "🔹", "▫️")
+
+# Slot-based node storage (no per-instance __dict__) where dataclasses support it (3.10+)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Max cleaned LLM responses kept in the shared response cache
+RESPONSE_CACHE_SIZE = 256
+
+# Content below this size is analyzed locally instead of with an extra Gemini round-trip
+SMALL_CONTENT_SIZE = 5000
+# Occurrences the top local phrase needs before it is trusted as the main topic
+MIN_TOPIC_OCCURRENCES = 2
+# Capitalized phrases ("Cell Membrane", "Krebs Cycle") used as local topic candidates
+_CAPITALIZED_PHRASE_RE = re.compile(r'\b[A-Z][a-z]{3,}(?:[ \t]+[A-Z][a-z]+){0,3}\b')
+# Capitalized sentence openers that are never topics
+_PHRASE_STOP_WORDS = frozenset({
+    'This', 'That', 'These', 'Those', 'There', 'They', 'Then', 'When', 'What',
+    'Which', 'Where', 'While', 'With', 'From', 'Each', 'Some', 'Many', 'Most',
+    'Also', 'However', 'Because', 'After', 'Before', 'Other', 'Such', 'Here',
+})
+
 # Content chunking settings
 MAX_CONTENT_SIZE = 200000  # ~200KB per chunk
 MAX_ANALYSIS_SIZE = 150000  # ~150KB for analysis
 
+# Static prompt bodies, formatted with only their dynamic slots per call
+ANALYSIS_PROMPT_TEMPLATE = """Analyze this content to create a mind map structure.
+
+Content sample:
+{sample}
+
+Provide JSON response with:
+1. main_topic: Central topic/theme (5-10 words)
+2. major_themes: List of 3-6 major themes
+3. estimated_depth: Recommended depth (2-5)
+4. complexity: "simple", "moderate", "complex"
+5. content_type: "educational", "technical", "conceptual", etc.
+
+IMPORTANT: Return ONLY valid JSON, no markdown, no extra text.
+
+Example format:
+{{"main_topic": "...", "major_themes": ["...", "..."], "estimated_depth": 3, "complexity": "moderate", "content_type": "educational"}}"""
+
+HIERARCHY_PROMPT_TEMPLATE = """Extract hierarchical mind map structure from this content.
+
+{chunk_info}
+Target Depth: {depth} levels
+
+Content:
+{chunk}
+
+Create a hierarchy with:
+- Level 0: Main topic (1 node)
+- Level 1: Major sections (2-5 nodes)
+- Level 2+: Key concepts (2-4 nodes each)
+
+For each node:
+- label: Brief title (2-6 words)
+- description: One sentence (10-20 words)
+- importance: 0.0-1.0
+- tags: 2-4 tags
+- examples: 1-2 examples
+
+Return JSON:
+{{
+  "root": {{
+    "label": "Main Topic",
+    "description": "Brief description",
+    "importance": 1.0,
+    "tags": ["tag1", "tag2"],
+    "examples": ["example1"],
+    "children": [
+      {{
+        "label": "Subtopic",
+        "description": "Description",
+        "importance": 0.8,
+        "tags": ["tag"],
+        "examples": ["ex"],
+        "children": [...]
+      }}
+    ]
+  }}
+}}
+
+IMPORTANT: Return ONLY valid JSON, no markdown."""
+
+RELATIONSHIP_PROMPT_TEMPLATE = """Identify relationships between these concepts (beyond parent-child):
+
+Concepts:
+{concepts}
+
+Return JSON mapping node IDs to related node IDs:
+{{"node_id_1": ["related_id_2", "related_id_3"], "node_id_2": ["related_id_4"]}}
+
+Only significant relationships. ONLY JSON, no markdown."""
+
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class MindMapNode:
     """Represents a single node in the mind map"""
     id: str
@@ -84,7 +189,7 @@ class MindMapNode:
         }
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class MindMap:
     """Represents a complete mind map"""
     title: str
@@ -103,99 +208,108 @@ class MindMap:
             'generated_at': self.generated_at
         }
     
+    def dump_json(self, f):
+        """Write the to_dict() JSON to a binary file, serializing one node at a time"""
+        f.write(b'{"title": ' + json_dumps(self.title) + b', "root_id": ' + json_dumps(self.root_id) + b', "nodes": {')
+        separator = b'\n  '
+        for node_id, node in self.nodes.items():
+            f.write(separator + json_dumps(node_id) + b': ' + json_dumps(node.to_dict()))
+            separator = b',\n  '
+        f.write(b'\n}, "metadata": ' + json_dumps(self.metadata) + b', "generated_at": ' + json_dumps(self.generated_at) + b'}\n')
+    
     def to_markdown(self) -> str:
         """Convert to beautiful markdown format"""
-        md = f"# 🗺️  Mind Map: {self.title}\n\n"
-        md += f"*Generated: {self.generated_at}*\n"
-        md += f"*Total Nodes: {len(self.nodes)} | Max Depth: {self.metadata.get('max_depth', 0)}*\n\n"
-        md += "---\n\n"
-        
-        def render_node(node_id: str, indent: int = 0):
+        parts = [
+            f"# 🗺️  Mind Map: {self.title}\n\n",
+            f"*Generated: {self.generated_at}*\n",
+            f"*Total Nodes: {len(self.nodes)} | Max Depth: {self.metadata.get('max_depth', 0)}*\n\n",
+            "---\n\n",
+        ]
+        
+        # Depth-first walk with an explicit stack; children are pushed reversed to keep their order
+        stack = [(self.root_id, 0)]
+        while stack:
+            node_id, indent = stack.pop()
             node = self.nodes[node_id]
             prefix = "  " * indent
             
             # Node with emoji based on level
-            emoji = "🎯" if indent == 0 else "📌" if indent == 1 else "🔹" if indent == 2 else "▫️"
-            result = f"{prefix}{emoji} **{node.label}**"
+            emoji = MARKDOWN_LEVEL_EMOJIS[min(indent, 3)]
+            parts.append(f"{prefix}{emoji} **{node.label}**")
             
             if node.description:
-                result += f"\n{prefix}  *{node.description}*"
+                parts.append(f"\n{prefix}  *{node.description}*")
             
-            result += "\n"
+            parts.append("\n")
             
             # Examples
             if node.examples:
-                result += f"{prefix}  💡 Examples:\n"
+                parts.append(f"{prefix}  💡 Examples:\n")
                 for example in node.examples[:2]:  # Limit to 2
-                    result += f"{prefix}    - {example}\n"
+                    parts.append(f"{prefix}    - {example}\n")
             
             # Tags
             if node.tags:
-                result += f"{prefix}  🏷️  Tags: {', '.join(node.tags[:4])}\n"
+                parts.append(f"{prefix}  🏷️  Tags: {', '.join(node.tags[:4])}\n")
             
-            result += "\n"
+            parts.append("\n")
             
             # Render children
-            for child_id in node.children:
-                result += render_node(child_id, indent + 1)
-            
-            return result
-        
-        md += render_node(self.root_id)
+            stack.extend((child_id, indent + 1) for child_id in reversed(node.children))
         
         # Add relationships section
         relationships = [(node.label, [self.nodes[rid].label for rid in node.related_nodes if rid in self.nodes]) 
                         for node in self.nodes.values() if node.related_nodes]
         
         if relationships:
-            md += "---\n\n"
-            md += "## 🔗 Key Relationships\n\n"
+            parts.append("---\n\n")
+            parts.append("## 🔗 Key Relationships\n\n")
             for node_label, related_labels in relationships:
                 if related_labels:
-                    md += f"- **{node_label}** ↔️ {', '.join(related_labels)}\n"
+                    parts.append(f"- **{node_label}** ↔️ {', '.join(related_labels)}\n")
         
-        return md
+        return "".join(parts)
     
     def to_mermaid(self) -> str:
         """Convert to Mermaid diagram format"""
-        mermaid = "graph TD\n"
+        decls = ["graph TD\n"]
+        hedges = []
+        redges = []
+        # Mermaid ids cannot contain '-'; convert each node id once
+        safe_ids = {node_id: node_id.replace('-', '_') for node_id in self.nodes}
         
-        # Add styled nodes
+        # One pass emits styled nodes, hierarchical connections and related (dotted) connections
         for node_id, node in self.nodes.items():
-            safe_id = node_id.replace('-', '_')
+            safe_id = safe_ids[node_id]
             label = node.label.replace('"', "'")[:50]  # Limit length
             
             # Style based on level
             if node.level == 0:
-                mermaid += f'    {safe_id}["{label}"]:::root\n'
+                decls.append(f'    {safe_id}["{label}"]:::root\n')
             elif node.level == 1:
-                mermaid += f'    {safe_id}["{label}"]:::level1\n'
+                decls.append(f'    {safe_id}["{label}"]:::level1\n')
             else:
-                mermaid += f'    {safe_id}["{label}"]\n'
-        
-        mermaid += "\n"
-        
-        # Add hierarchical connections
-        for node_id, node in self.nodes.items():
-            safe_id = node_id.replace('-', '_')
+                decls.append(f'    {safe_id}["{label}"]\n')
+            
             for child_id in node.children:
-                safe_child_id = child_id.replace('-', '_')
-                mermaid += f'    {safe_id} --> {safe_child_id}\n'
-        
-        # Add related connections (dotted)
-        for node_id, node in self.nodes.items():
-            safe_id = node_id.replace('-', '_')
+                safe_child_id = safe_ids.get(child_id) or child_id.replace('-', '_')
+                hedges.append(f'    {safe_id} --> {safe_child_id}\n')
+            
             for related_id in node.related_nodes:
                 if related_id in self.nodes:
-                    safe_related_id = related_id.replace('-', '_')
-                    mermaid += f'    {safe_id} -.-> {safe_related_id}\n'
+                    redges.append(f'    {safe_id} -.-> {safe_ids[related_id]}\n')
+        
+        lines = decls
+        lines.append("\n")
+        lines.extend(hedges)
+        lines.extend(redges)
         
         # Add styling
-        mermaid += "\n"
-        mermaid += "    classDef root fill:#e1f5ff,stroke:#01579b,stroke-width:3px\n"
-        mermaid += "    classDef level1 fill:#fff3e0,stroke:#e65100,stroke-width:2px\n"
+        lines.append("\n")
+        lines.append("    classDef root fill:#e1f5ff,stroke:#01579b,stroke-width:3px\n")
+        lines.append("    classDef level1 fill:#fff3e0,stroke:#e65100,stroke-width:2px\n")
         
-        return mermaid
+        return "".join(lines)
 
 
 class MindMapGenerator:
@@ -203,16 +317,39 @@ class MindMapGenerator:
     Enhanced Mind Map Generator with robust error handling
     """
     
+    # Validated JSON responses keyed by prompt hash, shared across instances
+    _response_cache: Dict[str, str] = {}
+    # Chunk extraction fills the cache from worker threads
+    _response_cache_lock = threading.Lock()
+    
     def __init__(
         self,
         gemini_api_key: Optional[str] = None,
         api_key_manager: Optional[APIKeyManager] = None,
         model_name: str = "gemini-2.0-flash",
-        verbose: bool = True
+        verbose: bool = True,
+        cache_enabled: bool = True
     ):
         """Initialize the Mind Map Generator"""
         self.model_name = model_name
         self.verbose = verbose
+        self.cache_enabled = cache_enabled
+        # Carriage-return progress bars only render on a terminal; captured logs (Render) get one line per update
+        self._is_tty = sys.stdout.isatty()
+        
+        # One keep-alive session for every Gemini call (analysis, each chunk, relationships, retries).
+        # Transient 5xx replies are retried with backoff on the pooled connection; 429 is left to
+        # call_gemini_with_retry so it can rotate to another API key instead of waiting.
+        retry = Retry(
+            total=2,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["POST"]),
+            raise_on_status=False
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+        self.session.headers.update({"Content-Type": "application/json"})
         
         if api_key_manager:
             self.api_key_manager = api_key_manager
@@ -235,6 +372,10 @@ class MindMapGenerator:
             Fore.GREEN
         )
     
+    def close(self):
+        """Release pooled HTTP connections"""
+        self.session.close()
+    
     def _log(self, message: str, color=Fore.YELLOW):
         """Log message if verbose is enabled"""
         if self.verbose:
@@ -242,7 +383,7 @@ class MindMapGenerator:
     
     def _print_progress(self, current: int, total: int, prefix: str = "Progress"):
         """Print a beautiful progress indicator"""
-        if not self.verbose:
+        if not self.verbose or not self._is_tty:
             return
         
         bar_length = 40
@@ -257,35 +398,19 @@ class MindMapGenerator:
     
     def _clean_json_response(self, response: str) -> str:
         """Clean and extract JSON from API response"""
-        response = response.strip()
-        
         # Remove markdown code blocks
-        if response.startswith("```json"):
-            response = response[7:]
-        elif response.startswith("```"):
-            response = response[3:]
-        
-        if response.endswith("```"):
-            response = response[:-3]
-        
-        response = response.strip()
-        
-        # Find JSON boundaries
-        if response.startswith('{'):
-            depth = 0
-            last_valid = -1
-            for i, char in enumerate(response):
-                if char == '{':
-                    depth += 1
-                elif char == '}':
-                    depth -= 1
-                    if depth == 0:
-                        last_valid = i
-                        break
-            if last_valid > 0:
-                response = response[:last_valid + 1]
-        
-        return response
+        response = _FENCE_RE.sub("", response).strip()
+        
+        # Find JSON boundaries: decode the first complete value in C and cut there
+        start = 0 if response.startswith('[') else response.find('{')
+        if start < 0:
+            return response
+        try:
+            _, end = _JSON_DECODER.raw_decode(response, start)
+            return response[start:end]
+        except json.JSONDecodeError:
+            # Leave malformed JSON for the caller's json.loads to report
+            return response[start:]
     
     def _call_gemini(
         self,
@@ -294,20 +419,22 @@ class MindMapGenerator:
         max_tokens: int = 8192
     ) -> str:
         """Call Gemini API with automatic retry"""
+        # Serialize the (possibly 150KB) prompt once; key rotation retries resend the same bytes
+        body = json_dumps({
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "temperature": temperature,
+                "topK": 40,
+                "topP": 0.95,
+                "maxOutputTokens": max_tokens,
+            }
+        })
+        
         if self.api_key_manager:
             def api_call(api_key: str) -> str:
-                response = requests.post(
+                response = self.session.post(
                     f"{GEMINI_API_URL}?key={api_key}",
-                    headers={"Content-Type": "application/json"},
-                    json={
-                        "contents": [{"parts": [{"text": prompt}]}],
-                        "generationConfig": {
-                            "temperature": temperature,
-                            "topK": 40,
-                            "topP": 0.95,
-                            "maxOutputTokens": max_tokens,
-                        }
-                    },
+                    data=body,
                     timeout=60
                 )
                 
@@ -327,18 +454,9 @@ class MindMapGenerator:
             )
         else:
             try:
-                response = requests.post(
+                response = self.session.post(
                     f"{GEMINI_API_URL}?key={self.gemini_api_key}",
-                    headers={"Content-Type": "application/json"},
-                    json={
-                        "contents": [{"parts": [{"text": prompt}]}],
-                        "generationConfig": {
-                            "temperature": temperature,
-                            "topK": 40,
-                            "topP": 0.95,
-                            "maxOutputTokens": max_tokens,
-                        }
-                    },
+                    data=body,
                     timeout=60
                 )
                 
@@ -354,6 +472,34 @@ class MindMapGenerator:
                 self._log(f"❌ Gemini API error: {str(e)}", Fore.RED)
                 return f"Error: {str(e)}"
     
+    def _call_gemini_json(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 8192,
+        validate=None
+    ) -> Any:
+        """Call Gemini and parse its JSON, reusing an earlier valid response for the same prompt"""
+        key = hashlib.blake2b(f"{prompt}|{temperature}|{max_tokens}".encode(), digest_size=16).hexdigest()
+        if self.cache_enabled:
+            with self._response_cache_lock:
+                cached = self._response_cache.get(key)
+            if cached is not None:
+                return json_loads(cached)
+        
+        response = self._clean_json_response(self._call_gemini(prompt, temperature=temperature, max_tokens=max_tokens))
+        result = json_loads(response)
+        if validate and not validate(result):
+            raise ValueError("Unexpected JSON structure")
+        
+        # Only responses that parsed and validated are cached, so retries still get fresh samples
+        if self.cache_enabled:
+            with self._response_cache_lock:
+                if len(self._response_cache) >= RESPONSE_CACHE_SIZE:
+                    self._response_cache.pop(next(iter(self._response_cache)), None)
+                self._response_cache[key] = response
+        return result
+    
     def _chunk_content(self, content: str, max_size: int) -> List[str]:
         """Split large content into manageable chunks"""
         if len(content) <= max_size:
@@ -361,18 +507,23 @@ class MindMapGenerator:
         
         chunks = []
         paragraphs = content.split('\n\n')
-        current_chunk = ""
+        # Collect the running chunk's paragraphs and track its size instead of growing one string
+        current_parts = []
+        current_size = 0
         
         for para in paragraphs:
-            if len(current_chunk) + len(para) + 2 <= max_size:
-                current_chunk += para + "\n\n"
+            para_size = len(para) + 2
+            if current_size + para_size <= max_size:
+                current_parts.append(para)
+                current_size += para_size
             else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = para + "\n\n"
+                if current_parts:
+                    chunks.append("\n\n".join(current_parts).strip())
+                current_parts = [para]
+                current_size = para_size
         
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        if current_parts:
+            chunks.append("\n\n".join(current_parts).strip())
         
         # Force split if still too large
         final_chunks = []
@@ -385,35 +536,53 @@ class MindMapGenerator:
         
         return final_chunks
     
+    def _heuristic_analysis(self, content: str) -> Optional[Dict[str, Any]]:
+        """Derive topic and themes locally from the most frequent capitalized phrases"""
+        counts = Counter(
+            phrase for phrase in _CAPITALIZED_PHRASE_RE.findall(content)
+            if phrase.split()[0] not in _PHRASE_STOP_WORDS
+        )
+        ranked = counts.most_common(7)
+        
+        # A topic seen only once is noise; let Gemini analyze the content instead
+        if not ranked or ranked[0][1] < MIN_TOPIC_OCCURRENCES:
+            return None
+        
+        phrases = [phrase for phrase, _ in ranked]
+        analysis = {
+            'main_topic': phrases[0],
+            'major_themes': phrases[1:7] or ['Theme 1', 'Theme 2', 'Theme 3'],
+            # No depth estimate locally: extraction uses the caller's max_depth
+            'estimated_depth': None,
+            'complexity': 'simple',
+            'content_type': 'general'
+        }
+        
+        self._log(f"✓ Main Topic: {analysis['main_topic']} (local analysis)", Fore.GREEN)
+        self._log(f"✓ Major Themes: {len(analysis['major_themes'])}", Fore.GREEN)
+        return analysis
+    
     def _analyze_structure(self, content: str) -> Dict[str, Any]:
         """Analyze content structure with retry logic"""
         self._log("\n🔍 Step 1: Analyzing content structure...", Fore.CYAN)
         
+        # Short notes: a full Gemini round-trip adds latency but little structure
+        if len(content) < SMALL_CONTENT_SIZE:
+            analysis = self._heuristic_analysis(content)
+            if analysis:
+                return analysis
+        
         sample = content[:MAX_ANALYSIS_SIZE] if len(content) > MAX_ANALYSIS_SIZE else content
         self._log(f"  Analyzing {len(sample):,} characters", Fore.BLUE)
         
-        analysis_prompt = f"""Analyze this content to create a mind map structure.
-
-Content sample:
-{sample}
-
-Provide JSON response with:
-1. main_topic: Central topic/theme (5-10 words)
-2. major_themes: List of 3-6 major themes
-3. estimated_depth: Recommended depth (2-5)
-4. complexity: "simple", "moderate", "complex"
-5. content_type: "educational", "technical", "conceptual", etc.
-
-IMPORTANT: Return ONLY valid JSON, no markdown, no extra text.
-
-Example format:
-{{"main_topic": "...", "major_themes": ["...", "..."], "estimated_depth": 3, "complexity": "moderate", "content_type": "educational"}}"""
+        analysis_prompt = ANALYSIS_PROMPT_TEMPLATE.format(sample=sample)
         
         for attempt in range(3):
             try:
-                response = self._call_gemini(analysis_prompt, temperature=0.3)
-                response = self._clean_json_response(response)
-                analysis = json.loads(response)
+                analysis = self._call_gemini_json(
+                    analysis_prompt, temperature=0.3,
+                    validate=lambda a: isinstance(a, dict)
+                )
                 
                 self._log(f"✓ Main Topic: {analysis.get('main_topic', 'Unknown')}", Fore.GREEN)
                 self._log(f"✓ Major Themes: {len(analysis.get('major_themes', []))}", Fore.GREEN)
@@ -423,8 +592,6 @@ Example format:
                 
             except (json.JSONDecodeError, Exception) as e:
                 self._log(f"⚠️ Analysis attempt {attempt + 1} failed: {str(e)[:80]}", Fore.YELLOW)
-                if attempt < 2:
-                    time.sleep(1)
                 continue
         
         # Fallback
@@ -445,62 +612,17 @@ Example format:
     ) -> Dict:
         """Extract hierarchical structure from a single chunk"""
         
-        hierarchy_prompt = f"""Extract hierarchical mind map structure from this content.
-
-{chunk_info}
-Target Depth: {depth} levels
-
-Content:
-{chunk}
-
-Create a hierarchy with:
-- Level 0: Main topic (1 node)
-- Level 1: Major sections (2-5 nodes)
-- Level 2+: Key concepts (2-4 nodes each)
-
-For each node:
-- label: Brief title (2-6 words)
-- description: One sentence (10-20 words)
-- importance: 0.0-1.0
-- tags: 2-4 tags
-- examples: 1-2 examples
-
-Return JSON:
-{{
-  "root": {{
-    "label": "Main Topic",
-    "description": "Brief description",
-    "importance": 1.0,
-    "tags": ["tag1", "tag2"],
-    "examples": ["example1"],
-    "children": [
-      {{
-        "label": "Subtopic",
-        "description": "Description",
-        "importance": 0.8,
-        "tags": ["tag"],
-        "examples": ["ex"],
-        "children": [...]
-      }}
-    ]
-  }}
-}}
-
-IMPORTANT: Return ONLY valid JSON, no markdown."""
+        hierarchy_prompt = HIERARCHY_PROMPT_TEMPLATE.format(chunk_info=chunk_info, depth=depth, chunk=chunk)
         
-        for attempt in range(3):
+        for _ in range(3):
             try:
-                response = self._call_gemini(hierarchy_prompt, temperature=0.5, max_tokens=8192)
-                response = self._clean_json_response(response)
-                hierarchy = json.loads(response)
-                
                 # Validate structure
-                if 'root' in hierarchy and isinstance(hierarchy['root'], dict):
-                    return hierarchy
+                return self._call_gemini_json(
+                    hierarchy_prompt, temperature=0.5, max_tokens=8192,
+                    validate=lambda h: isinstance(h, dict) and isinstance(h.get('root'), dict)
+                )
                 
             except (json.JSONDecodeError, Exception) as e:
-                if attempt < 2:
-                    time.sleep(0.5)
                 continue
         
         # Minimal fallback
@@ -524,7 +646,8 @@ IMPORTANT: Return ONLY valid JSON, no markdown."""
         """Extract hierarchical structure with chunking support"""
         self._log("\n🌳 Step 2: Extracting hierarchical structure...", Fore.CYAN)
         
-        depth = min(max_depth, analysis.get('estimated_depth', 3))
+        estimated_depth = analysis.get('estimated_depth', 3)
+        depth = min(max_depth, estimated_depth) if estimated_depth else max_depth
         chunks = self._chunk_content(content, MAX_CONTENT_SIZE)
         
         self._log(f"  Processing {len(chunks)} chunk(s)", Fore.BLUE)
@@ -534,26 +657,34 @@ IMPORTANT: Return ONLY valid JSON, no markdown."""
             chunk_info = f"Main Topic: {analysis.get('main_topic')}\nThemes: {', '.join(analysis.get('major_themes', []))}"
             return self._extract_hierarchy_from_chunk(chunks[0], chunk_info, depth)
         
-        # Multiple chunks - process and merge
+        # Multiple chunks - extract concurrently (each call is pure network wait), then merge in order
         all_hierarchies = []
+        chunk_infos = [f"Section {i+1}/{len(chunks)} of: {analysis.get('main_topic')}" for i in range(len(chunks))]
+        key_count = len(self.api_key_manager.get_key_list()) if self.api_key_manager else 1
         
-        for i, chunk in enumerate(chunks):
-            self._print_progress(i, len(chunks), "Extracting hierarchy")
-            
-            chunk_info = f"Section {i+1}/{len(chunks)} of: {analysis.get('main_topic')}"
-            hierarchy = self._extract_hierarchy_from_chunk(chunk, chunk_info, depth - 1)
-            
-            if hierarchy and 'root' in hierarchy:
-                all_hierarchies.append(hierarchy['root'])
+        self._print_progress(0, len(chunks), "Extracting hierarchy")
+        with ThreadPoolExecutor(max_workers=min(len(chunks), key_count * 2)) as executor:
+            results = executor.map(self._extract_hierarchy_from_chunk, chunks, chunk_infos, [depth - 1] * len(chunks))
+            for i, hierarchy in enumerate(results):
+                self._print_progress(i + 1, len(chunks), "Extracting hierarchy")
+                
+                if hierarchy and 'root' in hierarchy:
+                    all_hierarchies.append(hierarchy['root'])
         
-        self._print_progress(len(chunks), len(chunks), "Extracting hierarchy")
+        # Root tags: the tags most shared across section roots, else the analysis themes
+        tag_counts = Counter()
+        for section_root in all_hierarchies:
+            tags = section_root.get('tags', [])
+            if isinstance(tags, list):
+                tag_counts.update(str(tag) for tag in tags)
+        top_tags = [tag for tag, _ in tag_counts.most_common(4)] or analysis.get('major_themes', ['topic'])[:4]
         
         # Merge hierarchies under single root
         merged_root = {
             'label': analysis.get('main_topic', 'Main Topic'),
             'description': f"Comprehensive overview covering {len(chunks)} sections",
             'importance': 1.0,
-            'tags': analysis.get('major_themes', ['topic'])[:4],
+            'tags': top_tags,
             'examples': [],
             'children': all_hierarchies
         }
@@ -571,11 +702,18 @@ IMPORTANT: Return ONLY valid JSON, no markdown."""
         self._log("\n🗺️  Step 3: Building mind map...", Fore.CYAN)
         
         nodes = {}
-        root_id = str(uuid.uuid4())
+        # Short sequential ids ("n0", "n1", ...) only need to be unique within this map; they hash
+        # faster than UUID strings, are already Mermaid/Graphviz-safe and keep the relationship prompt small
+        id_counter = count()
         
-        def process_node(node_data: Dict, level: int = 0, parent_id: Optional[str] = None) -> str:
-            """Recursively process nodes"""
-            node_id = str(uuid.uuid4())
+        # Process root, then walk the hierarchy depth-first with an explicit stack
+        # (no recursion limit on deep LLM output); children are pushed reversed to keep their order
+        root_data = hierarchy.get('root', {})
+        root_id = None
+        stack = [(root_data, 0, None)]
+        while stack:
+            node_data, level, parent_id = stack.pop()
+            node_id = f"n{next(id_counter)}"
             
             node = MindMapNode(
                 id=node_id,
@@ -587,21 +725,21 @@ IMPORTANT: Return ONLY valid JSON, no markdown."""
                 tags=list(node_data.get('tags', []))[:6],
                 examples=list(node_data.get('examples', []))[:3]
             )
+            nodes[node_id] = node
+            
+            if parent_id is None:
+                root_id = node_id
+            else:
+                nodes[parent_id].children.append(node_id)
             
-            # Process children
+            # Queue children
             children_data = node_data.get('children', [])
             if isinstance(children_data, list):
-                for child_data in children_data:
-                    if isinstance(child_data, dict):
-                        child_id = process_node(child_data, level + 1, node_id)
-                        node.children.append(child_id)
-            
-            nodes[node_id] = node
-            return node_id
-        
-        # Process root
-        root_data = hierarchy.get('root', {})
-        root_id = process_node(root_data, 0, None)
+                stack.extend(
+                    (child_data, level + 1, node_id)
+                    for child_data in reversed(children_data)
+                    if isinstance(child_data, dict)
+                )
         
         self._log(f"✓ Built mind map with {len(nodes)} nodes", Fore.GREEN)
         
@@ -625,32 +763,22 @@ IMPORTANT: Return ONLY valid JSON, no markdown."""
         self._log("\n🔗 Step 4: Identifying relationships...", Fore.CYAN)
         
         # Limit nodes for relationship analysis
-        node_labels = {node_id: node.label for node_id, node in list(nodes.items())[:30]}
+        node_labels = {node_id: node.label for node_id, node in islice(nodes.items(), 30)}
         
-        relationship_prompt = f"""Identify relationships between these concepts (beyond parent-child):
-
-Concepts:
-{json.dumps(node_labels, indent=2)}
-
-Return JSON mapping node IDs to related node IDs:
-{{"node_id_1": ["related_id_2", "related_id_3"], "node_id_2": ["related_id_4"]}}
-
-Only significant relationships. ONLY JSON, no markdown."""
+        relationship_prompt = RELATIONSHIP_PROMPT_TEMPLATE.format(concepts=json_dumps(node_labels, indent=True).decode("utf-8"))
         
-        for attempt in range(2):
+        for _ in range(2):
             try:
-                response = self._call_gemini(relationship_prompt, temperature=0.4)
-                response = self._clean_json_response(response)
-                relationships = json.loads(response)
+                relationships = self._call_gemini_json(
+                    relationship_prompt, temperature=0.4,
+                    validate=lambda r: isinstance(r, dict)
+                )
                 
-                if isinstance(relationships, dict):
-                    total_rels = sum(len(rels) for rels in relationships.values())
-                    self._log(f"✓ Identified {total_rels} relationships", Fore.GREEN)
-                    return relationships
+                total_rels = sum(len(rels) for rels in relationships.values())
+                self._log(f"✓ Identified {total_rels} relationships", Fore.GREEN)
+                return relationships
                 
             except (json.JSONDecodeError, Exception):
-                if attempt == 0:
-                    time.sleep(0.5)
                 continue
         
         self._log("⚠️ Skipping relationship identification", Fore.YELLOW)
@@ -724,8 +852,8 @@ Only significant relationships. ONLY JSON, no markdown."""
         """Save mind map with error handling"""
         try:
             if format == "json":
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(mindmap.to_dict(), f, indent=2, ensure_ascii=False)
+                with open(filepath, 'wb') as f:
+                    mindmap.dump_json(f)
             
             elif format == "markdown":
                 with open(filepath, 'w', encoding='utf-8') as f:
@@ -11,6 +11,7 @@ Enhanced version with:
 
 Dependencies:
     pip install requests colorama python-dotenv PyPDF2 python-docx
+    pip install pymupdf  # optional, much faster PDF text extraction
 
 Usage:
     python mindmap_main.py
@@ -23,6 +24,7 @@ import sys
 import argparse
 from pathlib import Path
 from typing import Optional
+from contextlib import contextmanager
 import time
 
 # from colorama import Fore, Style, init (Removed for Render compatibility)
@@ -48,6 +50,23 @@ class Style:
 # init(autoreset=True)
 
 
+@contextmanager
+def _open_pdf_pages(file_path: Path):
+    """Yield (page_count, page texts) from PyMuPDF when installed, else PyPDF2"""
+    try:
+        # PyMuPDF extracts text in native MuPDF code, typically ~10x faster than PyPDF2
+        import fitz
+    except ImportError:
+        import PyPDF2
+        with open(file_path, 'rb') as f:
+            pdf_reader = PyPDF2.PdfReader(f)
+            yield len(pdf_reader.pages), (page.extract_text() for page in pdf_reader.pages)
+        return
+    
+    with fitz.open(str(file_path)) as doc:
+        yield doc.page_count, (page.get_text("text") for page in doc)
+
+
 class MindMapApp:
     """Main application with beautiful UI"""
     
@@ -114,24 +133,23 @@ class MindMapApp:
             
             # PDF files
             elif file_path.suffix == '.pdf':
+                pages = []
                 try:
-                    import PyPDF2
-                    content = ""
-                    with open(file_path, 'rb') as f:
-                        pdf_reader = PyPDF2.PdfReader(f)
-                        total_pages = len(pdf_reader.pages)
+                    with _open_pdf_pages(file_path) as (total_pages, page_texts):
                         print(f"   Pages: {total_pages}")
                         
-                        for i, page in enumerate(pdf_reader.pages, 1):
-                            content += page.extract_text() + "\n"
+                        for i, text in enumerate(page_texts, 1):
+                            pages.append(text)
                             if i % 10 == 0:
                                 print(f"   Progress: {i}/{total_pages} pages", end='\r')
                         
                         print(f"   Progress: {total_pages}/{total_pages} pages")
                         
                 except ImportError:
-                    print(f"{Fore.YELLOW}⚠️  PyPDF2 not installed. Install: pip install PyPDF2{Style.RESET_ALL}")
+                    print(f"{Fore.YELLOW}⚠️  No PDF reader installed. Install: pip install pymupdf (or PyPDF2){Style.RESET_ALL}")
                     return None
+                
+                content = "".join(text + "\n" for text in pages)
             
             # DOCX files
             elif file_path.suffix == '.docx':
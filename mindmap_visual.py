@@ -18,7 +18,7 @@ Usage:
 
 import os
 import json
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
 from pathlib import Path
 import textwrap
 import html
@@ -123,16 +123,12 @@ IMPORTANT:
         
         for attempt in range(3):
             try:
-                response = self._call_gemini(
+                return self._call_gemini_json(
                     hierarchy_prompt, 
                     temperature=0.6,
-                    max_tokens=8192
+                    max_tokens=8192,
+                    validate=lambda h: isinstance(h, dict) and isinstance(h.get('root'), dict)
                 )
-                response = self._clean_json_response(response)
-                hierarchy = json.loads(response)
-                
-                if 'root' in hierarchy and isinstance(hierarchy['root'], dict):
-                    return hierarchy
                 
             except (json.JSONDecodeError, Exception) as e:
                 if attempt < 2:
@@ -151,67 +147,32 @@ IMPORTANT:
         }
 
 
+# Label icon per depth (root, sections, concepts, everything deeper)
+NODE_LEVEL_ICONS = ('🎯', '💡', '📌', '→')
+
+
+class LevelStyle(NamedTuple):
+    """Card colors for one hierarchy level"""
+    gradient_start: str
+    gradient_end: str
+    text_color: str
+    border: str
+    shadow: str
+
+
 class MindMapVisualizer:
     """AI-powered 3D visualization using Graphviz"""
     
     # Default fallback palette
     DEFAULT_LEVEL_STYLES = [
-        {
-            'gradient_start': '#667EEA',
-            'gradient_end': '#764BA2',
-            'text_color': '#FFFFFF',
-            'border': '#5A67D8',
-            'shadow': '#4C51BF',
-        },
-        {
-            'gradient_start': '#F857A6',
-            'gradient_end': '#FF5858',
-            'text_color': '#FFFFFF',
-            'border': '#EC4899',
-            'shadow': '#DB2777',
-        },
-        {
-            'gradient_start': '#48C6EF',
-            'gradient_end': '#6F86D6',
-            'text_color': '#FFFFFF',
-            'border': '#3B82F6',
-            'shadow': '#2563EB',
-        },
-        {
-            'gradient_start': '#11998E',
-            'gradient_end': '#38EF7D',
-            'text_color': '#FFFFFF',
-            'border': '#10B981',
-            'shadow': '#059669',
-        },
-        {
-            'gradient_start': '#FA8BFF',
-            'gradient_end': '#2BD2FF',
-            'text_color': '#FFFFFF',
-            'border': '#EC4899',
-            'shadow': '#DB2777',
-        },
-        {
-            'gradient_start': '#FF6A00',
-            'gradient_end': '#EE0979',
-            'text_color': '#FFFFFF',
-            'border': '#F97316',
-            'shadow': '#EA580C',
-        },
-        {
-            'gradient_start': '#C471F5',
-            'gradient_end': '#FA71CD',
-            'text_color': '#FFFFFF',
-            'border': '#A855F7',
-            'shadow': '#9333EA',
-        },
-        {
-            'gradient_start': '#FFD200',
-            'gradient_end': '#F7971E',
-            'text_color': '#1F2937',
-            'border': '#F59E0B',
-            'shadow': '#D97706',
-        },
+        LevelStyle('#667EEA', '#764BA2', '#FFFFFF', '#5A67D8', '#4C51BF'),
+        LevelStyle('#F857A6', '#FF5858', '#FFFFFF', '#EC4899', '#DB2777'),
+        LevelStyle('#48C6EF', '#6F86D6', '#FFFFFF', '#3B82F6', '#2563EB'),
+        LevelStyle('#11998E', '#38EF7D', '#FFFFFF', '#10B981', '#059669'),
+        LevelStyle('#FA8BFF', '#2BD2FF', '#FFFFFF', '#EC4899', '#DB2777'),
+        LevelStyle('#FF6A00', '#EE0979', '#FFFFFF', '#F97316', '#EA580C'),
+        LevelStyle('#C471F5', '#FA71CD', '#FFFFFF', '#A855F7', '#9333EA'),
+        LevelStyle('#FFD200', '#F7971E', '#1F2937', '#F59E0B', '#D97706'),
     ]
     
     def __init__(self, mindmap: MindMap, generator: Optional[MindMapGenerator] = None):
@@ -221,7 +182,7 @@ class MindMapVisualizer:
         self.LEVEL_STYLES = None
         self.keyword_highlights = {}
     
-    def _generate_ai_styling(self, title: str) -> Tuple[List[Dict], Dict[str, str]]:
+    def _generate_ai_styling(self, title: str) -> Tuple[List[LevelStyle], Dict[str, str]]:
         """Generate beautiful color scheme and keyword highlights using Gemini AI"""
         if not self.generator:
             print(f"{Fore.YELLOW}⚠️  No generator available, using default styling{Style.RESET_ALL}")
@@ -295,13 +256,13 @@ IMPORTANT:
                             # Basic hex validation
                             if all(style[key].startswith('#') and len(style[key]) == 7 
                                    for key in ['gradient_start', 'gradient_end', 'text_color', 'border']):
-                                valid_scheme.append({
-                                    'gradient_start': style['gradient_start'],
-                                    'gradient_end': style['gradient_end'],
-                                    'text_color': style['text_color'],
-                                    'border': style['border'],
-                                    'shadow': style['border'],
-                                })
+                                valid_scheme.append(LevelStyle(
+                                    gradient_start=style['gradient_start'],
+                                    gradient_end=style['gradient_end'],
+                                    text_color=style['text_color'],
+                                    border=style['border'],
+                                    shadow=style['border'],
+                                ))
                     
                     if len(valid_scheme) >= 8:
                         print(f"{Fore.GREEN}✓ Generated custom color theme: {theme_desc}{Style.RESET_ALL}")
@@ -352,14 +313,7 @@ IMPORTANT:
             lines = []
             
             # Icon based on level
-            if node.level == 0:
-                icon = '🎯'
-            elif node.level == 1:
-                icon = '💡'
-            elif node.level == 2:
-                icon = '📌'
-            else:
-                icon = '→'
+            icon = NODE_LEVEL_ICONS[min(node.level, 3)]
             
             # Title
             title = f"{icon} {node.label}"
@@ -388,15 +342,7 @@ IMPORTANT:
             return "\n".join(lines)
         else:
             # Minimal view - just title with icon
-            if node.level == 0:
-                icon = '🎯'
-            elif node.level == 1:
-                icon = '💡'
-            elif node.level == 2:
-                icon = '📌'
-            else:
-                icon = '→'
-            return f"{icon} {node.label}"
+            return f"{NODE_LEVEL_ICONS[min(node.level, 3)]} {node.label}"
     
     def _get_node_style(self, node: MindMapNode) -> Dict:
         """Get stunning 3D card-style with AI-generated colors"""
@@ -408,13 +354,13 @@ IMPORTANT:
         style_config = self.LEVEL_STYLES[level]
         
         # Rich diagonal gradient for depth and dimension
-        gradient = f'{style_config["gradient_start"]}:{style_config["gradient_end"]}'
+        gradient = f'{style_config.gradient_start}:{style_config.gradient_end}'
         
         style = {
             'fillcolor': gradient,
             'gradientangle': '135',
-            'color': style_config['border'],
-            'fontcolor': style_config['text_color'],
+            'color': style_config.border,
+            'fontcolor': style_config.text_color,
             'style': 'filled,rounded,bold',
             'shape': 'box',
             'fontname': 'Helvetica Neue',
@@ -499,7 +445,7 @@ IMPORTANT:
                 
                 # Rich, vibrant edges that complement the card colors
                 level = min(node.level, len(self.LEVEL_STYLES) - 1)
-                edge_color = self.LEVEL_STYLES[level]['border']
+                edge_color = self.LEVEL_STYLES[level].border
                 
                 # Dynamic edge width based on importance
                 child_node = self.mindmap.nodes[child_id]
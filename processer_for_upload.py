@@ -5,6 +5,7 @@ from typing import List, Dict, Optional, Tuple
 import re
 import pickle
 import time
+from collections import Counter
 from datetime import datetime, timedelta
 import numpy as np
 from pathlib import Path
@@ -21,6 +22,16 @@ try:
 except ImportError:
     TAVILY_AVAILABLE = False
 
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 
+    'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 
+    'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 
+    'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might',
+    'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it',
+    'we', 'they', 'what', 'which', 'who', 'when', 'where', 'why', 'how'
+})
+_WORD_RE = re.compile(r'\b\w+\b')
+
 class DocumentChunker:
     """Intelligent document chunking for large files"""
     
@@ -164,6 +175,17 @@ class EmbeddingCache:
             cache_file.unlink()
 
 
+_SENTENCE_MODEL = None
+
+
+def _get_sentence_model():
+    """Load the sentence transformer once per process and share it across indexes"""
+    global _SENTENCE_MODEL
+    if _SENTENCE_MODEL is None:
+        _SENTENCE_MODEL = SentenceTransformer('all-MiniLM-L6-v2')
+    return _SENTENCE_MODEL
+
+
 class HybridEmbedding:
     """Hybrid embedding system combining keyword and semantic search"""
     
@@ -174,30 +196,18 @@ class HybridEmbedding:
         
         if self.use_semantic:
             try:
-                self.model = SentenceTransformer('all-MiniLM-L6-v2')
+                self.model = _get_sentence_model()
             except Exception as e:
                 print(f"Warning: Could not load sentence transformer: {e}")
                 self.use_semantic = False
     
     def extract_keywords(self, text: str, top_n: int = 20) -> Dict[str, int]:
         """Extract important keywords with frequency"""
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 
-            'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 
-            'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 
-            'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might',
-            'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it',
-            'we', 'they', 'what', 'which', 'who', 'when', 'where', 'why', 'how'
-        }
-        
-        words = re.findall(r'\b\w+\b', text.lower())
-        freq = {}
-        for word in words:
-            if len(word) > 3 and word not in stop_words:
-                freq[word] = freq.get(word, 0) + 1
-        
-        top_keywords = dict(sorted(freq.items(), key=lambda x: x[1], reverse=True)[:top_n])
-        return top_keywords
+        freq = Counter(
+            word for word in _WORD_RE.findall(text.lower())
+            if len(word) > 3 and word not in STOP_WORDS
+        )
+        return dict(freq.most_common(top_n))
     
     def get_semantic_embedding(self, text: str) -> Optional[np.ndarray]:
         """Get semantic embedding using sentence transformers"""
@@ -207,11 +217,13 @@ class HybridEmbedding:
         cache_key = f"embedding_{hashlib.md5(text.encode()).hexdigest()}"
         cached = self.cache.get(cache_key)
         if cached:
-            return np.array(cached['embedding'])
+            # Older entries were stored as lists of Python floats
+            return np.asarray(cached['embedding'], dtype=np.float32)
         
         try:
-            embedding = self.model.encode(text[:5000], convert_to_numpy=True)
-            self.cache.set(cache_key, {'embedding': embedding.tolist()})
+            embedding = self.model.encode(text[:5000], convert_to_numpy=True).astype(np.float32, copy=False)
+            # Keep the float32 array as-is: pickles to 4 bytes per dim instead of a boxed float list
+            self.cache.set(cache_key, {'embedding': embedding})
             return embedding
         except Exception as e:
             print(f"Embedding error: {e}")
@@ -382,17 +394,18 @@ class WebSearchIntegration:
         if not search_response:
             return []
         
-        results = []
-        for item in search_response.get('results', []):
-            results.append({
+        # Skip entries without any text before building their result dicts
+        return [
+            {
                 'source': item.get('url', ''),
                 'title': item.get('title', ''),
-                'content': item.get('raw_content') or item.get('content', ''),
+                'content': content,
                 'score': item.get('score', 0),
                 'type': 'web'
-            })
-        
-        return results
+            }
+            for item in search_response.get('results') or ()
+            if isinstance(item, dict) and (content := item.get('raw_content') or item.get('content'))
+        ]
 
 
 class RAGDocumentProcessor:
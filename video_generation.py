@@ -1,13 +1,18 @@
 import os
 import json
 from typing import List, Dict
-import requests
 from PIL import Image
 import io
+import re
 import time
 
 # Import the external API key manager
 from api_key_manager import APIKeyManager, call_gemini_with_retry
+from http_utils import HTTP_SESSION
+from json_utils import json_loads
+
+# First fenced code block in a model reply, with or without a json tag
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
 
 class SlideshowGenerator:
     """
@@ -32,6 +37,9 @@ class SlideshowGenerator:
         self.hf_api_key = hf_api_key or os.environ.get("STABLE_DIFFUSION_API_KEY")
         self.murf_api_key = murf_api_key or os.environ.get("MURF_API_KEY")
         
+        # Shared pooled session so Gemini/HF/Murf calls reuse TCP+TLS connections
+        self.session = HTTP_SESSION
+        
         self.gemini_url = "https://generativelanguage.googleapis.com/v1beta/models"
         self.gemini_model = "gemini-2.0-flash-exp"
         self.visual_style = None
@@ -68,10 +76,10 @@ class SlideshowGenerator:
                 }
             }
             
-            response = requests.post(url, headers=headers, json=payload)
+            response = self.session.post(url, headers=headers, json=payload)
             response.raise_for_status()
             
-            result = response.json()
+            result = json_loads(response.content)
             return result['candidates'][0]['content']['parts'][0]['text']
         
         # Use the external retry function with API key rotation
@@ -114,7 +122,7 @@ Return ONLY valid JSON:
         style_text = self._call_gemini(style_prompt, temperature=0.5)
         
         style_text = self._extract_json(style_text)
-        style_json = json.loads(style_text)
+        style_json = json_loads(style_text)
         self.visual_style = style_json
         self.base_visual_prompt = style_json['base_prompt']
         
@@ -163,7 +171,7 @@ Return ONLY valid JSON:
         content_text = self._call_gemini(content_prompt, temperature=0.7)
         
         content_text = self._extract_json(content_text)
-        presentation_data = json.loads(content_text)
+        presentation_data = json_loads(content_text)
         presentation_data['visual_style'] = self.visual_style
         
         print(f"✓ Generated {len(presentation_data['slides'])} slides successfully")
@@ -173,10 +181,9 @@ Return ONLY valid JSON:
         """Extract JSON from markdown code blocks or plain text."""
         text = text.strip()
         
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0].strip()
+        fence = _FENCE_RE.search(text)
+        if fence:
+            text = fence.group(1)
         
         start = text.find('{')
         end = text.rfind('}') + 1
@@ -227,13 +234,13 @@ Return ONLY valid JSON:
                     "options": {"wait_for_model": True}
                 }
                 
-                response = requests.post(url, headers=headers, json=payload)
+                response = self.session.post(url, headers=headers, json=payload)
                 
                 # Handle model loading delay
                 if response.status_code == 503:
                     print(f"  Model {model} is loading, waiting 20 seconds...")
                     time.sleep(20)
-                    response = requests.post(url, headers=headers, json=payload)
+                    response = self.session.post(url, headers=headers, json=payload)
                 
                 response.raise_for_status()
                 
@@ -300,7 +307,7 @@ Return ONLY valid JSON:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = self.session.post(url, headers=headers, json=payload)
             response.raise_for_status()
             
             result = response.json()
@@ -308,7 +315,7 @@ Return ONLY valid JSON:
             # Download the audio file from the URL provided
             if 'audioFile' in result:
                 audio_url = result['audioFile']
-                audio_response = requests.get(audio_url)
+                audio_response = self.session.get(audio_url)
                 audio_response.raise_for_status()
                 
                 with open(output_path, 'wb') as f:
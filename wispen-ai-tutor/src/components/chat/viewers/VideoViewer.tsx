@@ -60,6 +60,8 @@ const VideoViewer: React.FC<VideoViewerProps> = ({ video, onClose }) => {
     const requestRef = useRef<number>(null!);
     const startTimeRef = useRef<number>(0);
     const imageCache = useRef<Map<string, HTMLImageElement>>(new Map());
+    // Arrow endpoints + head points per layer; layers are static, so the trig runs once
+    const arrowCache = useRef<WeakMap<VideoLayer, number[]>>(new WeakMap());
 
     // Resolve video source - check multiple possible property names
     const videoSource = video.videoUrl || video.url || video.fileUrl || (video as any).video_url;
@@ -238,20 +240,30 @@ const VideoViewer: React.FC<VideoViewerProps> = ({ video, onClose }) => {
                             ctx.fillText(layer.label, layer.x, layer.y + 4);
                         }
                     } else if (layer.shape === 'arrow') {
-                        const headlen = 10;
-                        const fromX = layer.x;
-                        const fromY = layer.y;
-                        const toX = layer.targetX || fromX + 50;
-                        const toY = layer.targetY || fromY;
-                        const dx = toX - fromX;
-                        const dy = toY - fromY;
-                        const angle = Math.atan2(dy, dx);
+                        let points = arrowCache.current.get(layer);
+                        if (!points) {
+                            const headlen = 10;
+                            const fromX = layer.x;
+                            const fromY = layer.y;
+                            const toX = layer.targetX || fromX + 50;
+                            const toY = layer.targetY || fromY;
+                            const dx = toX - fromX;
+                            const dy = toY - fromY;
+                            const angle = Math.atan2(dy, dx);
+                            points = [
+                                fromX, fromY, toX, toY,
+                                toX - headlen * Math.cos(angle - Math.PI / 6), toY - headlen * Math.sin(angle - Math.PI / 6),
+                                toX - headlen * Math.cos(angle + Math.PI / 6), toY - headlen * Math.sin(angle + Math.PI / 6)
+                            ];
+                            arrowCache.current.set(layer, points);
+                        }
+                        const [fromX, fromY, toX, toY, leftX, leftY, rightX, rightY] = points;
                         ctx.beginPath();
                         ctx.moveTo(fromX, fromY);
                         ctx.lineTo(toX, toY);
-                        ctx.lineTo(toX - headlen * Math.cos(angle - Math.PI / 6), toY - headlen * Math.sin(angle - Math.PI / 6));
+                        ctx.lineTo(leftX, leftY);
                         ctx.moveTo(toX, toY);
-                        ctx.lineTo(toX - headlen * Math.cos(angle + Math.PI / 6), toY - headlen * Math.sin(angle + Math.PI / 6));
+                        ctx.lineTo(rightX, rightY);
                         ctx.stroke();
                     }
                 }
@@ -269,15 +281,22 @@ const VideoViewer: React.FC<VideoViewerProps> = ({ video, onClose }) => {
                 else if (layer.type === 'particles') {
                     const stepProgress = (time % 2000) / 2000;
                     const count = layer.count || 5;
+                    // Path endpoints are the same for every particle; resolve them once per frame
+                    const sx = layer.source?.x || 0;
+                    const sy = layer.source?.y || 0;
+                    const dx = (layer.target?.x || 0) - sx;
+                    const dy = (layer.target?.y || 0) - sy;
                     ctx.fillStyle = layer.color || '#f59e0b';
+                    // Collect every particle into one path so the canvas rasterizes them in a single fill
+                    ctx.beginPath();
                     for (let i = 0; i < count; i++) {
                         const pP = (stepProgress + (i / count)) % 1;
-                        const px = (layer.source?.x || 0) + ((layer.target?.x || 0) - (layer.source?.x || 0)) * pP;
-                        const py = (layer.source?.y || 0) + ((layer.target?.y || 0) - (layer.source?.y || 0)) * pP;
-                        ctx.beginPath();
+                        const px = sx + dx * pP;
+                        const py = sy + dy * pP;
+                        ctx.moveTo(px + 2.5, py);
                         ctx.arc(px, py, 2.5, 0, Math.PI * 2);
-                        ctx.fill();
                     }
+                    ctx.fill();
                 }
 
                 ctx.restore();